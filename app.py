@@ -1,70 +1,38 @@
 import streamlit as st
 import pandas as pd
-import joblib
 import numpy as np
  
-# Load model and data
-model = joblib.load("model_DecisionTree.pkl")
-historical_df = pd.read_csv("Clean_Dataset.csv")
-historical_df.columns = historical_df.columns.str.strip()
- 
-# Model columns
-model_columns = [
-    'stops', 'days_left', 'duration_mins', 'red_eye', 'is_peak_departure', 'cross_region',
-    'days_duration_interaction', 'stops_per_hour',
-    'airline_AirAsia', 'airline_Air_India', 'airline_GO_FIRST', 'airline_Indigo', 'airline_SpiceJet', 'airline_Vistara',
-    'source_city_Bangalore', 'source_city_Chennai', 'source_city_Delhi', 'source_city_Hyderabad', 'source_city_Kolkata', 'source_city_Mumbai',
-    'departure_time_Afternoon', 'departure_time_Early_Morning', 'departure_time_Evening', 'departure_time_Late_Night', 'departure_time_Morning', 'departure_time_Night',
-    'arrival_time_Afternoon', 'arrival_time_Early_Morning', 'arrival_time_Evening', 'arrival_time_Late_Night', 'arrival_time_Morning', 'arrival_time_Night',
-    'destination_city_Bangalore', 'destination_city_Chennai', 'destination_city_Delhi', 'destination_city_Hyderabad', 'destination_city_Kolkata', 'destination_city_Mumbai',
-    'class_Business', 'class_Economy',
-    'airline_tier_High-Cost', 'airline_tier_Low-cost',
-    'booking_type_Advance', 'booking_type_Last_Minute', 'booking_type_Near',
-    'duration_category_Long', 'duration_category_Medium'
-]
- 
-# Helper functions
-def categorize_booking_type(days_left):
-    if days_left <= 3:
-        return 'Last_Minute'
-    elif days_left <= 20:
-        return 'Near'
-    else:
-        return 'Advance'
- 
-def determine_airline_tier(airline):
-    return 'High-Cost' if airline in ['Vistara', 'Air_India'] else 'Low-cost'
- 
-def is_red_eye(departure_time, arrival_time):
-    return int(departure_time in ['Late_Night', 'Night'] and arrival_time in ['Early_Morning', 'Morning'])
- 
-def categorize_duration(duration_mins):
-    return 'Medium' if duration_mins < 180 else 'Long'
- 
-def get_price_tips(features):
-    tips = []
-    if features.get('class_Business', 0) == 1:
-        tips.append("✈️ Consider flying Economy class to save costs.")
-    if features.get('booking_type_Last_Minute', 0) == 1 or features.get('booking_type_Near', 0) == 1:
-        tips.append("📅 Booking earlier can help get better prices.")
-    if features.get('airline_tier_High-Cost', 0) == 1:
-        tips.append("💰 Choosing low-cost airlines can save you money.")
-    if not tips:
-        tips.append("🎉 Your flight details look optimized for the best price!")
-    return tips
- 
-# Region mapping
-region_map = {
-    'Delhi': 'North', 'Mumbai': 'West', 'Bangalore': 'South',
-    'Kolkata': 'East', 'Hyderabad': 'South', 'Chennai': 'South'
-}
- 
-# Data options
-airlines = ['AirAsia', 'Air_India', 'GO_FIRST', 'Indigo', 'SpiceJet', 'Vistara']
-cities = ['Bangalore', 'Chennai', 'Delhi', 'Hyderabad', 'Kolkata', 'Mumbai']
-departure_times = ['Afternoon', 'Early_Morning', 'Evening', 'Late_Night', 'Morning', 'Night']
-arrival_times = ['Afternoon', 'Early_Morning', 'Evening', 'Late_Night', 'Morning', 'Night']
-classes = ['Economy', 'Business']
+import metrics
+from features import (
+    FeatureEncoder, is_cross_region,
+    airlines, cities, departure_times, arrival_times, classes, stops_options,
+    business_airlines, min_days_left, max_days_left, min_duration_mins
+)
+from insights import booking_curve, cheapest_day, price_with_tips
+from optimizer import rank_itineraries
+from prediction_cache import CachedPredictor
+from resources import (
+    artifact_version, get_load_stats, get_prediction_cache, get_result_cache, load_duration_suggestions,
+    load_fare_sketches, load_leaf_intervals, load_route_index, load_similar_flights, load_tree_engine
+)
+ 
+# Load model and data (loaded once per process, reloaded when the files change)
+with metrics.timer("artifact_lookup"):
+    duration_index = load_route_index()
+    duration_suggestions = load_duration_suggestions()
+    fare_sketches = load_fare_sketches()
+    similar_flights = load_similar_flights()
+    encoder = FeatureEncoder()
+    # Flat-array tree engine: same predictions as model.predict without sklearn's per-call overhead
+    tree_engine = load_tree_engine()
+    leaf_intervals = load_leaf_intervals()
+    # Predictions are cached across sessions until the model file changes
+    predictor = CachedPredictor(tree_engine, encoder, get_prediction_cache(), artifact_version("model"))
+    # Booking curves and itinerary rankings are cached whole, keyed by their inputs
+    result_cache = get_result_cache()
+    results_version = (artifact_version("model"), artifact_version("historical_df"))
+# Prometheus scrape endpoint, when FLIGHT_METRICS and FLIGHT_METRICS_PORT are set
+metrics.start_http_server()
  
 def add_custom_css():
     st.markdown("""
@@ -364,7 +332,12 @@ st.markdown('''
 # Main columns
 col1, col2 = st.columns([1, 1], gap="large")
  
-with col1:
+def offers_business(airline):
+    return airline in business_airlines
+ 
+# Route and flight details rerun on their own when one of their widgets changes
+@st.fragment
+def route_section():
     # Flight route section
     st.markdown('''
     <div class="form-card fade-in-up">
@@ -379,8 +352,7 @@ with col1:
         available_destinations = [c for c in cities if c != source]
         destination = st.selectbox("🛬 To", available_destinations, key="destination")
    
-    cross_region = int(region_map[source] != region_map[destination])
-    route_type = "Cross-region flight" if cross_region else "Same-region flight"
+    route_type = "Cross-region flight" if is_cross_region(source, destination) else "Same-region flight"
     st.markdown(f'<div class="info-box">📍 {route_type}</div>', unsafe_allow_html=True)
    
     # Flight details section
@@ -394,17 +366,10 @@ with col1:
     with airline_col1:
         airline = st.selectbox("🏢 Airline", airlines, key="airline")
     with airline_col2:
-        stops = st.selectbox("🔄 Number of Stops", options=[0, 1, 2, 3, 4, 5], index=0, key="stops")
- 
-    stop_map = {0: 'zero', 1: 'one', 2: 'two_or_more', 3: 'two_or_more', 4: 'two_or_more', 5: 'two_or_more'}
-    stop_label = stop_map.get(stops, 'two_or_more')
-    matching_rows = historical_df[
-        (historical_df['source_city'] == source) &
-        (historical_df['destination_city'] == destination) &
-        (historical_df['stops'] == stop_label)
-    ]
-    suggested_duration = matching_rows['duration'].median() * 60 if not matching_rows.empty else 130
-    suggested_duration = int(suggested_duration)
+        stops = st.selectbox("🔄 Number of Stops", options=stops_options, index=0, key="stops")
+ 
+    with metrics.timer("route_lookup"):
+        suggested_duration = duration_suggestions[(source, destination, stops)]
    
     if "duration_mins" not in st.session_state:
         st.session_state.duration_mins = suggested_duration
@@ -417,6 +382,70 @@ with col1:
     st.session_state["last_src"] = source
     st.session_state["last_dst"] = destination
  
+    # Duration and class follow the route and the airline, so they are drawn
+    # here and update with this fragment instead of redrawing the whole page
+    duration_col1, duration_col2 = st.columns(2)
+    with duration_col1:
+        st.number_input("⏱️ Flight Duration Hours", min_value=0, value=st.session_state.duration_mins // 60, key="duration_hours")
+    with duration_col2:
+        st.number_input("⏱️ Flight Duration Minutes", min_value=0, max_value=59, value=st.session_state.duration_mins % 60, key="duration_minutes")
+ 
+    if offers_business(airline):
+        st.selectbox("💺 Travel Class", classes, key="class")
+    else:
+        st.markdown('<div class="info-box">💺 Economy class (standard for this airline)</div>', unsafe_allow_html=True)
+ 
+def submit_prediction():
+    # Runs before the rerun that the submit button triggers
+    state = st.session_state
+    duration_mins = state.duration_hours * 60 + state.duration_minutes
+    for key in ["price", "booking_curve", "fare_rank", "price_band", "itineraries", "similar_flights"]:
+        state.pop(key, None)
+    state.form_error = duration_mins <= min_duration_mins
+    if state.form_error:
+        metrics.count("errors", stage="validation")
+        return
+ 
+    source, destination, airline = state.source, state.destination, state.airline
+    flight_class = state["class"] if offers_business(airline) else 'Economy'
+    query = {
+        'airline': airline,
+        'source_city': source,
+        'destination_city': destination,
+        'departure_time': state.dep_time,
+        'arrival_time': state.arr_time,
+        'stops': state.stops,
+        'duration_mins': duration_mins,
+        'days_left': state.days,
+        'class': flight_class
+    }
+    with metrics.timer("encode"):
+        X = encoder.encode(query)
+    with metrics.timer("price_with_tips"):
+        state.price, state.tips = price_with_tips(predictor, encoder, query)
+    metrics.count("predictions")
+    with metrics.timer("price_band"):
+        state.price_band = leaf_intervals.predict(X)
+    with metrics.timer("fare_rank"):
+        state.fare_rank = fare_sketches.cheaper_than(state.price, source, destination, flight_class, airline)
+    with metrics.timer("booking_curve"):
+        # Every field but days_left, which the curve varies
+        curve_key = ("booking_curve",) + tuple(value for field, value in query.items() if field != 'days_left')
+        state.booking_curve = result_cache.get_or_compute(
+            curve_key, results_version, lambda: booking_curve(tree_engine, encoder, query)
+        )
+    state.days_left = state.days
+    with metrics.timer("similar_flights"):
+        state.similar_flights = similar_flights.nearest(source, destination, airline, flight_class, state.days, duration_mins)
+    with metrics.timer("itineraries"):
+        state.itineraries = result_cache.get_or_compute(
+            ("itineraries", source, destination, state.days), results_version,
+            lambda: rank_itineraries(tree_engine, encoder, duration_index, source, destination, state.days)
+        )
+ 
+with col1:
+    route_section()
+ 
 with col2:
     # Schedule & Preferences section
     st.markdown('''
@@ -425,31 +454,15 @@ with col2:
     </div>
     ''', unsafe_allow_html=True)
    
+    # Form widgets only rerun the page on submit
     with st.form("flight_prediction_form", clear_on_submit=False):
         time_col1, time_col2 = st.columns(2)
         with time_col1:
-            departure = st.selectbox("🛫 Departure Time", departure_times, key="dep_time")
-           
-            # Convert suggested_duration (in mins) to hours and minutes
-            suggested_hours = st.session_state.duration_mins // 60
-            suggested_minutes = st.session_state.duration_mins % 60
-           
-            # Input for hours and minutes separately
-            duration_hours = st.number_input("⏱️ Flight Duration Hours", min_value=0, value=suggested_hours, key="duration_hours")
-            duration_minutes = st.number_input("⏱️ Flight Duration Minutes", min_value=0, max_value=59, value=suggested_minutes, key="duration_minutes")
-           
-            # Calculate total duration in minutes for backend/model
-            duration_mins = duration_hours * 60 + duration_minutes
+            st.selectbox("🛫 Departure Time", departure_times, key="dep_time")
  
         with time_col2:
-            arrival = st.selectbox("🛬 Arrival Time", arrival_times, key="arr_time")
-            days_left = st.slider("📅 Days Until Departure", min_value=0, max_value=60, value=7, key="days")
- 
-        if airline in ['Air_India', 'Vistara']:
-            flight_class = st.selectbox("💺 Travel Class", classes, key="class")
-        else:
-            flight_class = 'Economy'
-            st.markdown('<div class="info-box">💺 Economy class (standard for this airline)</div>', unsafe_allow_html=True)
+            st.selectbox("🛬 Arrival Time", arrival_times, key="arr_time")
+            st.slider("📅 Days Until Departure", min_value=min_days_left, max_value=max_days_left, value=7, key="days")
  
         st.markdown('''
         <div class="time-reference">
@@ -460,57 +473,15 @@ with col2:
         </div>
         ''', unsafe_allow_html=True)
  
-        submitted = st.form_submit_button("🔮 Predict Flight Price")
+        st.form_submit_button("🔮 Predict Flight Price", on_click=submit_prediction)
  
  
-# Handle form submission
-if submitted:
-    if duration_mins <= 30:
-        st.markdown('<div class="error-box">❌ Error: Flight duration must be more than 30 minutes. Commercial flights typically don\'t operate with such short durations.</div>', unsafe_allow_html=True)
-        if "price" in st.session_state:
-            del st.session_state["price"]
-    else:
-        red_eye = is_red_eye(departure, arrival)
-        is_peak_departure = int(departure in ['Morning', 'Early_Morning'])
-        days_duration_interaction = days_left * duration_mins
-        stops_per_hour = stops / (duration_mins / 60) if duration_mins > 0 else 0
-        booking_type = categorize_booking_type(days_left)
-        airline_tier = determine_airline_tier(airline)
-        duration_category = categorize_duration(duration_mins)
- 
-        features = {
-            'stops': stops,
-            'days_left': days_left,
-            'duration_mins': duration_mins,
-            'red_eye': red_eye,
-            'is_peak_departure': is_peak_departure,
-            'cross_region': cross_region,
-            'days_duration_interaction': days_duration_interaction,
-            'stops_per_hour': stops_per_hour
-        }
- 
-        features_full = {col: 0 for col in model_columns}
-        features_full.update(features)
- 
-        features_full[f'airline_{airline}'] = 1
-        features_full[f'source_city_{source}'] = 1
-        features_full[f'destination_city_{destination}'] = 1
-        features_full[f'departure_time_{departure}'] = 1
-        features_full[f'arrival_time_{arrival}'] = 1
-        features_full[f'class_{flight_class}'] = 1
-        features_full[f'airline_tier_{airline_tier}'] = 1
-        features_full[f'booking_type_{booking_type}'] = 1
-        features_full[f'duration_category_{duration_category}'] = 1
- 
-        input_df = pd.DataFrame([features_full])
-        input_df = input_df.reindex(columns=model_columns, fill_value=0)
- 
-        st.session_state.price = model.predict(input_df)[0]
-        st.session_state.tips = get_price_tips(features_full)
+# Shown once, on the rerun right after the rejected submit
+if st.session_state.pop("form_error", False):
+    st.markdown('<div class="error-box">❌ Error: Flight duration must be more than 30 minutes. Commercial flights typically don\'t operate with such short durations.</div>', unsafe_allow_html=True)
  
  
-# Display results if available and duration is valid
-if "price" in st.session_state and ("duration" not in st.session_state or st.session_state.duration > 30):
+def render_results():
     price = st.session_state.price
     tips = st.session_state.tips
  
@@ -518,6 +489,18 @@ if "price" in st.session_state and ("duration" not in st.session_state or st.ses
     price_in_inr = price * SGD_TO_INR_RATE
     show_inr = st.checkbox("Show price in Indian Rupees (INR)")
  
+    fare_rank = st.session_state.get("fare_rank")
+    if fare_rank is None:
+        price_context_html = ''
+    else:
+        price_context_html = f'<div style="color:white; font-size: 1rem; opacity: 0.9;">📊 Cheaper than {fare_rank:.0f}% of historical fares for this route, airline and class</div>'
+ 
+    band = st.session_state.get("price_band")
+    if band is not None and band['count'][0] > 1:
+        band_rate = SGD_TO_INR_RATE if show_inr else 1
+        band_symbol = "₹" if show_inr else "SGD"
+        price_context_html += f'<div style="color:white; font-size: 1rem; opacity: 0.9;">📏 Likely range: {band_symbol} {band["p10"][0] * band_rate:,.2f} – {band["p90"][0] * band_rate:,.2f} (from {band["count"][0]:,} similar training fares)</div>'
+ 
     if show_inr:
         st.markdown(f'''
         <div class="results-card">
@@ -525,6 +508,7 @@ if "price" in st.session_state and ("duration" not in st.session_state or st.ses
                 <div class="price-label">🎉 Your Flight Price Prediction</div>
                 <div class="price-amount">₹ {price_in_inr:,.2f}</div>
                 <div style="color:white; font-size: 1rem; opacity: 0.8;">(SGD {price:,.2f})</div>
+                {price_context_html}
             </div>
             <div class="tips-title">💡 Smart Money-Saving Tips</div>
         </div>
@@ -535,10 +519,132 @@ if "price" in st.session_state and ("duration" not in st.session_state or st.ses
             <div class="price-display">
                 <div class="price-label">🎉 Your Flight Price Prediction</div>
                 <div class="price-amount">SGD {price:,.2f}</div>
+                {price_context_html}
             </div>
             <div class="tips-title">💡 Smart Money-Saving Tips</div>
         </div>
         ''', unsafe_allow_html=True)
  
     for tip in tips:
-        st.markdown(f'<div class="tip-item">{tip}</div>', unsafe_allow_html=True)
+        if tip['savings'] is None:
+            tip_text = tip['text']
+        elif show_inr:
+            tip_text = f"{tip['text']} could save ₹ {tip['savings'] * SGD_TO_INR_RATE:,.2f} (SGD {tip['savings']:,.2f})"
+        else:
+            tip_text = f"{tip['text']} could save SGD {tip['savings']:,.2f}"
+        st.markdown(f'<div class="tip-item">{tip_text}</div>', unsafe_allow_html=True)
+ 
+    if "booking_curve" in st.session_state:
+        rate = SGD_TO_INR_RATE if show_inr else 1
+        currency = "INR" if show_inr else "SGD"
+        curve = st.session_state.booking_curve.assign(price=lambda df: df['price'] * rate)
+        best = cheapest_day(curve)
+ 
+        st.markdown(f'''
+        <div class="tips-title">📉 Cheapest Day to Book</div>
+        <div class="info-box">🗓️ Booking {int(best['days_left'])} days before departure gives the lowest predicted price: {currency} {best['price']:,.2f}</div>
+        ''', unsafe_allow_html=True)
+ 
+        # Plain Vega-Lite spec: building and validating the equivalent Altair
+        # chart took most of this panel's rerun time
+        x = {'field': 'days_left', 'type': 'quantitative', 'title': 'Days Until Departure'}
+        y = {'field': 'price', 'type': 'quantitative', 'title': f'Predicted Price ({currency})'}
+        st.vega_lite_chart(curve, {
+            'layer': [
+                {
+                    'mark': 'line',
+                    'encoding': {'x': x, 'y': y, 'tooltip': [
+                        {'field': 'days_left', 'type': 'quantitative'},
+                        {'field': 'price', 'type': 'quantitative', 'format': ',.2f'}
+                    ]}
+                },
+                {
+                    'mark': {'type': 'point', 'size': 80, 'color': '#0066FF'},
+                    'transform': [{'filter': f"datum.days_left == {int(st.session_state.days_left)}"}],
+                    'encoding': {'x': x, 'y': y}
+                },
+                {
+                    'mark': {'type': 'point', 'size': 140, 'filled': True, 'color': '#FF6B35'},
+                    'transform': [{'filter': f"datum.days_left == {int(best['days_left'])}"}],
+                    'encoding': {'x': x, 'y': y}
+                }
+            ]
+        }, use_container_width=True)
+ 
+    if "itineraries" in st.session_state and not st.session_state.itineraries.empty:
+        rate = SGD_TO_INR_RATE if show_inr else 1
+        currency = "INR" if show_inr else "SGD"
+        itineraries = st.session_state.itineraries
+ 
+        st.markdown('<div class="tips-title">🧭 Cheapest Itineraries on This Route</div>', unsafe_allow_html=True)
+        st.dataframe(
+            pd.DataFrame({
+                'Airline': itineraries['airline'],
+                'Departure': itineraries['departure_time'],
+                'Arrival': itineraries['arrival_time'],
+                'Stops': itineraries['stops'].map({0: '0', 1: '1', 2: '2+'}),
+                'Class': itineraries['class'],
+                'Duration': itineraries['duration_mins'].map(lambda m: f"{m // 60}h {m % 60:02d}m"),
+                f'Price ({currency})': (itineraries['price'] * rate).round(2)
+            }),
+            hide_index=True,
+            use_container_width=True
+        )
+ 
+    if "similar_flights" in st.session_state and not st.session_state.similar_flights.empty:
+        rate = SGD_TO_INR_RATE if show_inr else 1
+        currency = "INR" if show_inr else "SGD"
+        similar = st.session_state.similar_flights
+ 
+        st.markdown('<div class="tips-title">🔎 Similar Historical Flights</div>', unsafe_allow_html=True)
+        st.dataframe(
+            pd.DataFrame({
+                'Departure': similar['departure_time'],
+                'Arrival': similar['arrival_time'],
+                'Stops': similar['stops'],
+                'Days Before': similar['days_left'],
+                'Duration': similar['duration'].map(lambda h: f"{int(h)}h {round(h % 1 * 60):02d}m"),
+                f'Price ({currency})': (similar['price'] * rate).round(2)
+            }),
+            hide_index=True,
+            use_container_width=True
+        )
+ 
+# Results rerun on their own, so switching currency doesn't touch the route or form
+@st.fragment
+def results_panel():
+    with metrics.timer("render"):
+        render_results()
+ 
+# Display results if available and duration is valid
+if "price" in st.session_state and ("duration" not in st.session_state or st.session_state.duration > 30):
+    results_panel()
+ 
+# Debug panel, only while metrics are being collected (FLIGHT_METRICS=1)
+if metrics.registry.enabled:
+    with st.expander("🛠️ Performance metrics"):
+        snap = metrics.snapshot()
+        st.markdown(f"Process memory (RSS): {snap['rss_bytes'] / 1e6:,.1f} MB")
+        if snap['stages']:
+            st.dataframe(
+                pd.DataFrame(snap['stages']).assign(
+                    mean_ms=lambda df: df['total_seconds'] / df['count'] * 1000,
+                    p50_ms=lambda df: df['p50_seconds'] * 1000,
+                    p90_ms=lambda df: df['p90_seconds'] * 1000,
+                    p99_ms=lambda df: df['p99_seconds'] * 1000
+                ).drop(columns=['total_seconds', 'p50_seconds', 'p90_seconds', 'p99_seconds']),
+                hide_index=True,
+                use_container_width=True
+            )
+        if snap['counters']:
+            st.dataframe(pd.DataFrame(snap['counters']), hide_index=True, use_container_width=True)
+        # Artifacts shared by every session: how often each was (re)loaded and what it cost
+        load_stats = get_load_stats()
+        st.dataframe(
+            pd.DataFrame.from_dict(load_stats, orient='index').rename_axis('artifact').reset_index().assign(
+                last_load_ms=lambda df: df['last_load_seconds'] * 1000,
+                total_load_ms=lambda df: df['total_load_seconds'] * 1000
+            )[['artifact', 'loads', 'hits', 'last_load_ms', 'total_load_ms']],
+            hide_index=True,
+            use_container_width=True
+        )
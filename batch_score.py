@@ -0,0 +1,177 @@
+import argparse
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from features import FeatureEncoder, normalize_queries, valid_queries
+from resources import MODEL_PATH, load_leaf_intervals, load_model
+
+DEFAULT_CHUNKSIZE = 100_000
+PRICE_COLUMN = "predicted_price"
+
+
+def is_parquet(path):
+    return os.path.splitext(path)[1].lower() in (".parquet", ".pq")
+
+
+def iter_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    # Only one chunk is held in memory at a time, whatever the file size
+    if is_parquet(path):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+def score_frame(model, encoder, df):
+    # Rows that cannot be priced (missing or unknown values, or rejected by
+    # the form's rules) get NaN instead of failing the whole file
+    queries = normalize_queries(df, errors='coerce')
+    prices = np.full(len(queries), np.nan)
+    valid = valid_queries(queries)
+    if valid.any():
+        prices[valid] = encoder.predict(model, encoder.encode_batch(queries[valid]))
+    return prices
+
+
+def score_frame_with_intervals(intervals, encoder, df):
+    # Price plus the p10/p50/p90 band of its leaf, all from one apply() call
+    queries = normalize_queries(df, errors='coerce')
+    valid = valid_queries(queries)
+    columns = {PRICE_COLUMN: 'price', 'price_p10': 'p10', 'price_p50': 'p50', 'price_p90': 'p90', 'leaf_count': 'count'}
+    scored = pd.DataFrame(np.nan, index=df.index, columns=list(columns))
+    if valid.any():
+        predicted = intervals.predict(encoder.encode_batch(queries[valid]))
+        for column, key in columns.items():
+            scored.loc[valid, column] = predicted[key]
+    return scored
+
+
+class ChunkWriter:
+    # Chunks go to a temporary file next to the output, which only replaces
+    # it once every chunk is written; a failed run leaves no partial file
+    def __init__(self, path):
+        self.path = path
+        directory, name = os.path.split(path)
+        self.tmp_path = os.path.join(directory, f".tmp-{name}")
+        self.parquet = is_parquet(path)
+        self._parquet_writer = None
+        self._schema = None
+        self._first = True
+
+    def _conform(self, df):
+        # CSV chunks infer their dtypes separately: one empty cell turns an int
+        # column into float, one 'abc' into object. Later chunks are brought to
+        # the first chunk's schema; values that don't fit become nulls.
+        df = df.copy()
+        for field in self._schema:
+            column = df[field.name]
+            if (pa.types.is_integer(field.type) or pa.types.is_floating(field.type)) and column.dtype == object:
+                df[field.name] = pd.to_numeric(column, errors='coerce')
+            elif pa.types.is_string(field.type) and column.dtype != object:
+                df[field.name] = column.astype(object).where(column.notna(), None).map(lambda v: v if v is None else str(v))
+        return pa.Table.from_pandas(df, preserve_index=False).cast(self._schema, safe=False)
+
+    def write(self, df):
+        if self.parquet:
+            if self._schema is None:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                self._schema = table.schema
+                self._parquet_writer = pq.ParquetWriter(self.tmp_path, self._schema)
+            else:
+                table = self._conform(df)
+            self._parquet_writer.write_table(table)
+        else:
+            df.to_csv(self.tmp_path, mode="w" if self._first else "a", header=self._first, index=False)
+        self._first = False
+
+    def append_part(self, part_path):
+        # Joins a file ChunkWriter wrote for a shard of the same input
+        if self.parquet:
+            part = pq.ParquetFile(part_path)
+            for i in range(part.num_row_groups):
+                table = part.read_row_group(i)
+                if self._schema is None:
+                    self._schema = table.schema
+                    self._parquet_writer = pq.ParquetWriter(self.tmp_path, self._schema)
+                elif not table.schema.equals(self._schema, check_metadata=False):
+                    table = self._conform(table.to_pandas())
+                self._parquet_writer.write_table(table)
+        else:
+            with open(part_path, "rb") as src, open(self.tmp_path, "wb" if self._first else "ab") as dst:
+                if not self._first:
+                    src.readline()  # every part starts with the header
+                shutil.copyfileobj(src, dst, 1 << 20)
+        self._first = False
+
+    def close(self, completed=True):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+        if not completed:
+            if os.path.exists(self.tmp_path):
+                os.remove(self.tmp_path)
+        elif not self._first:
+            os.replace(self.tmp_path, self.path)
+
+
+def write_scored(scored_chunks, output_path):
+    # scored_chunks yields (chunk, prices) pairs in input order; prices may
+    # also be a frame of several output columns
+    start = time.perf_counter()
+    rows = 0
+    unscored = 0
+    writer = ChunkWriter(output_path)
+    completed = False
+    try:
+        for chunk, prices in scored_chunks:
+            if isinstance(prices, pd.DataFrame):
+                for column in prices:
+                    chunk[column] = prices[column].to_numpy()
+            else:
+                chunk[PRICE_COLUMN] = prices
+            writer.write(chunk)
+            rows += len(chunk)
+            unscored += int(chunk[PRICE_COLUMN].isna().sum())
+        completed = True
+    finally:
+        writer.close(completed)
+    elapsed = time.perf_counter() - start
+    return {"rows": rows, "unscored_rows": unscored, "seconds": elapsed,
+            "rows_per_sec": rows / elapsed if elapsed > 0 else 0.0}
+
+
+def score_file(input_path, output_path, model=None, chunksize=DEFAULT_CHUNKSIZE, encoder=None, intervals=None):
+    encoder = encoder or FeatureEncoder()
+    chunks = iter_chunks(input_path, chunksize)
+    if intervals is not None:
+        scored = ((chunk, score_frame_with_intervals(intervals, encoder, chunk)) for chunk in chunks)
+    else:
+        model = model if model is not None else load_model()
+        scored = ((chunk, score_frame(model, encoder, chunk)) for chunk in chunks)
+    return write_scored(scored, output_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet file of flight queries in chunks")
+    parser.add_argument("input", help="CSV or Parquet file of flight queries")
+    parser.add_argument("output", help="CSV or Parquet file to write, chosen by extension")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--intervals", action="store_true",
+                        help="Add p10/p50/p90 fare bands from the model's leaves (built from the historical dataset)")
+    args = parser.parse_args()
+
+    intervals = load_leaf_intervals(args.model) if args.intervals else None
+    stats = score_file(args.input, args.output, model=load_model(args.model), chunksize=args.chunksize, intervals=intervals)
+    print(f"Scored {stats['rows']:,} rows in {stats['seconds']:.2f}s ({stats['rows_per_sec']:,.0f} rows/sec)")
+    if stats["unscored_rows"]:
+        print(f"{stats['unscored_rows']:,} rows could not be priced and have no {PRICE_COLUMN}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import argparse
+import asyncio
+import json
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+
+from st_client import AppSession
+
+DEFAULT_ROUNDS = 20
+SUBMIT_LABEL = "🔮 Predict Flight Price"
+INR_LABEL = "Show price in Indian Rupees (INR)"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(app_path, port, *options):
+    # options: extra "--section.option value" arguments for streamlit run
+    return subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", app_path, "--server.headless", "true",
+         "--server.port", str(port), "--server.fileWatcherType", "none", *options],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def wait_ready(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/_stcore/health", timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"Streamlit server at {url} did not come up")
+
+
+async def time_interactions(url, rounds):
+    # RerunTiming of every interaction, in order
+    session = await AppSession(url).connect()
+    try:
+        timings = {"first load": [await session.rerun()]}
+        # One prediction up front so the results panel (and its INR toggle) exists
+        await session.click(SUBMIT_LABEL)
+        interactions = {
+            "full page rerun": lambda i: session.rerun(),
+            "toggle INR": lambda i: session.set(INR_LABEL, i % 2 == 0),
+            "change airline": lambda i: session.set("airline", ["SpiceJet", "Indigo"][i % 2]),
+            "change stops": lambda i: session.set("stops", [1, 0][i % 2]),
+            "change source": lambda i: session.set("source", ["Mumbai", "Delhi"][i % 2]),
+            "submit form": lambda i: session.click(SUBMIT_LABEL),
+        }
+        for i in range(rounds):
+            for name, interact in interactions.items():
+                timings.setdefault(name, []).append(await interact(i))
+        return timings
+    finally:
+        session.close()
+
+
+def summarize(timings):
+    summary = {}
+    for name, runs in timings.items():
+        wall = np.array([t.wall for t in runs]) * 1000
+        # Script time is what the app itself costs; wall time adds Streamlit's
+        # fixed per-rerun messaging overhead on top
+        script = np.array([t.script if t.script is not None else np.nan for t in runs]) * 1000
+        summary[name] = {
+            "script_median_ms": float(np.median(script)),
+            "script_p90_ms": float(np.percentile(script, 90)),
+            "wall_median_ms": float(np.median(wall)),
+            "wall_p90_ms": float(np.percentile(wall, 90)),
+            "reruns": float(np.mean([t.runs for t in runs])),
+        }
+    return summary
+
+
+def bench_app(app_path, rounds):
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    server = start_server(app_path, port)
+    try:
+        wait_ready(url)
+        return summarize(asyncio.run(time_interactions(url, rounds)))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time each UI interaction against a running Streamlit server")
+    parser.add_argument("--app", nargs="+", default=["app.py"], help="App scripts to compare, each on its own server")
+    parser.add_argument("--url", help="Time an already running server instead of starting one")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    if args.url:
+        results = {args.url: summarize(asyncio.run(time_interactions(args.url.rstrip("/"), args.rounds)))}
+    else:
+        results = {app_path: bench_app(app_path, args.rounds) for app_path in args.app}
+
+    names = list(next(iter(results.values())))
+    for label, summary in results.items():
+        print(label)
+        print(f"  {'interaction':<18} {'script ms':>10} {'p90':>8} {'wall ms':>9} {'p90':>8} {'runs':>5}")
+        for name in names:
+            r = summary[name]
+            print(f"  {name:<18} {r['script_median_ms']:>10.1f} {r['script_p90_ms']:>8.1f} "
+                  f"{r['wall_median_ms']:>9.1f} {r['wall_p90_ms']:>8.1f} {r['reruns']:>5.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# Only the standard library at module level: the cold-start measurement runs
+# this file in a fresh interpreter and must not pay for numpy/pandas up front.
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_FILE = "Clean_Dataset.csv"
+MODEL_FILE = "model_DecisionTree.pkl"
+
+DEFAULT_ROWS = 50_000
+DEFAULT_RERUNS = 20
+DEFAULT_SINGLE_REPEAT = 2000
+DEFAULT_THRESHOLD = 0.20
+DEFAULT_REPEAT = 3
+BATCH_SIZES = [1, 64, 1024, 16384]
+
+# Metrics (by prefix) where a larger value is an improvement; all others are costs
+higher_is_better = ("batch_rows_per_sec",)
+
+# Tail percentiles swing more between runs, so they get twice the threshold
+tail_metrics = ("_p90_", "_p99_")
+
+
+def synthetic_dataset(rows, seed=0):
+    # Same columns and value sets as Clean_Dataset.csv, with prices driven by
+    # class, days_left, stops and duration so the tree has structure to learn
+    import numpy as np
+    import pandas as pd
+    from features import airlines, arrival_times, business_airlines, cities, departure_times
+
+    rng = np.random.default_rng(seed)
+    source = rng.choice(cities, rows)
+    offset = rng.integers(1, len(cities), rows)
+    destination = np.array(cities)[(np.searchsorted(cities, source) + offset) % len(cities)]
+    airline = rng.choice(airlines, rows)
+    business = np.isin(airline, business_airlines) & (rng.random(rows) < 0.3)
+    stops = rng.choice(['zero', 'one', 'two_or_more'], rows, p=[0.15, 0.75, 0.10])
+    duration = np.round(rng.gamma(4, 2.5, rows) + (stops != 'zero') * 2 + 0.8, 2)
+    days_left = rng.integers(1, 50, rows)
+    price = 4000 + business * 45000 + 180 * (50 - days_left) + 250 * duration + rng.normal(0, 900, rows)
+    return pd.DataFrame({
+        'airline': airline,
+        'flight': [f"XX-{n}" for n in rng.integers(100, 1000, rows)],
+        'source_city': source,
+        'departure_time': rng.choice(departure_times, rows),
+        'stops': stops,
+        'arrival_time': rng.choice(arrival_times, rows),
+        'destination_city': destination,
+        'class': np.where(business, 'Business', 'Economy'),
+        'duration': duration,
+        'days_left': days_left,
+        'price': np.maximum(price.round(), 1000).astype(int),
+    })
+
+
+def sampled_dataset(csv_path, rows, seed=0):
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+    df.columns = df.columns.str.strip()
+    df = df[[col for col in df.columns if not col.startswith('Unnamed')]]
+    return df.sample(min(rows, len(df)), random_state=seed).reset_index(drop=True)
+
+
+def train_model(df, max_depth=14, seed=0):
+    # Fitted on a DataFrame, like the real model, so feature_names_in_ is set
+    import pandas as pd
+    from sklearn.tree import DecisionTreeRegressor
+    from features import FeatureEncoder, model_columns, normalize_queries
+
+    X = pd.DataFrame(FeatureEncoder().encode_batch(normalize_queries(df)), columns=model_columns)
+    return DecisionTreeRegressor(max_depth=max_depth, random_state=seed).fit(X, df['price'])
+
+
+def prepare(workdir, rows, data=None, seed=0):
+    import joblib
+
+    df = sampled_dataset(data, rows, seed) if data else synthetic_dataset(rows, seed)
+    df.to_csv(os.path.join(workdir, DATASET_FILE))
+    joblib.dump(train_model(df, seed=seed), os.path.join(workdir, MODEL_FILE))
+    return len(df)
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def _percentiles_ms(seconds, *levels):
+    import numpy as np
+    return [float(np.percentile(seconds, level)) * 1000 for level in levels]
+
+
+def measure_cold_start(args):
+    # Imports plus model and dataset load, as the first rerun of a fresh app process sees them
+    start = time.perf_counter()
+    import resources
+    resources.load_model()
+    resources.load_historical_df()
+    return {"cold_start_seconds": time.perf_counter() - start, "cold_start_peak_rss_mb": _peak_rss_mb()}
+
+
+def measure_rerun(args):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(REPO_DIR, "app.py"), default_timeout=120).run()
+    at.button[0].click().run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    # Reruns with a prediction on screen, the page's most expensive steady state
+    seconds = []
+    for _ in range(args.reruns):
+        start = time.perf_counter()
+        at.run()
+        seconds.append(time.perf_counter() - start)
+    median, p90 = _percentiles_ms(seconds, 50, 90)
+    return {"rerun_median_ms": median, "rerun_p90_ms": p90, "app_peak_rss_mb": _peak_rss_mb()}
+
+
+def _encoded_sample(rows, seed=0):
+    from features import FeatureEncoder, normalize_queries
+    from resources import load_historical_df
+
+    df = load_historical_df()
+    return FeatureEncoder().encode_batch(normalize_queries(df.sample(min(rows, len(df)), random_state=seed)))
+
+
+def measure_predict(args):
+    import numpy as np
+    import pandas as pd
+    from features import model_columns
+    from resources import load_model, load_tree_engine
+
+    X = _encoded_sample(args.single_repeat)
+    model = load_model()
+    # The app's engine, and sklearn itself for reference
+    paths = {
+        "predict": load_tree_engine().predict,
+        "sklearn_predict": lambda x: model.predict(pd.DataFrame(x, columns=model_columns)),
+    }
+    results = {}
+    for name, predict in paths.items():
+        seconds = np.empty(len(X))
+        for i in range(len(X)):
+            row = X[i:i + 1]
+            start = time.perf_counter()
+            predict(row)
+            seconds[i] = time.perf_counter() - start
+        p50, p99 = _percentiles_ms(seconds, 50, 99)
+        results[f"{name}_p50_us"] = p50 * 1000
+        results[f"{name}_p99_us"] = p99 * 1000
+    return results
+
+
+def measure_batch(args):
+    import numpy as np
+    from batch_score import score_frame
+    from features import FeatureEncoder
+    from resources import load_historical_df, load_tree_engine
+
+    df = load_historical_df()
+    engine = load_tree_engine()
+    encoder = FeatureEncoder()
+    results = {}
+    for size in BATCH_SIZES:
+        chunk = df.iloc[np.arange(size) % len(df)]
+        # Repeat until the batch size has had at least half a second of work
+        rows, elapsed = 0, 0.0
+        while elapsed < 0.5 or rows < 3 * size:
+            start = time.perf_counter()
+            score_frame(engine, encoder, chunk)
+            elapsed += time.perf_counter() - start
+            rows += size
+        results[f"batch_rows_per_sec_{size}"] = rows / elapsed
+    return results
+
+
+measurements = {
+    "cold_start": measure_cold_start,
+    "rerun": measure_rerun,
+    "predict": measure_predict,
+    "batch": measure_batch,
+}
+
+
+def _run_measurement(name, workdir, args):
+    # Each measurement gets a fresh interpreter so caches and peak RSS don't carry over
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [REPO_DIR, os.environ.get("PYTHONPATH")]))}
+    cmd = [sys.executable, os.path.abspath(__file__), "measure", name,
+           "--reruns", str(args.reruns), "--single-repeat", str(args.single_repeat)]
+    out = subprocess.run(cmd, cwd=workdir, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def environment():
+    import numpy
+    import pandas
+    import sklearn
+    import streamlit
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "sklearn": sklearn.__version__,
+        "streamlit": streamlit.__version__,
+    }
+
+
+def run_suite(args):
+    with tempfile.TemporaryDirectory(prefix="flight_bench_") as tmp:
+        workdir = args.workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        rows = prepare(workdir, args.rows, args.data, args.seed)
+        results = {}
+        for name in measurements:
+            start = time.perf_counter()
+            # Median over separate processes evens out run-to-run noise in the µs metrics
+            runs = [_run_measurement(name, workdir, args) for _ in range(args.repeat)]
+            for metric in runs[0]:
+                results[metric] = sorted(run[metric] for run in runs)[len(runs) // 2]
+            print(f"{name:<12} done in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return {
+        "config": {"rows": rows, "data": args.data or "synthetic", "seed": args.seed,
+                   "repeat": args.repeat, "reruns": args.reruns, "single_repeat": args.single_repeat},
+        "environment": environment(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    # Relative change per metric, positive meaning worse; regressions exceed threshold
+    rows = []
+    for name, value in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None or before == 0:
+            continue
+        change = (value - before) / before
+        if name.startswith(higher_is_better):
+            change = -change
+        allowed = threshold * 2 if any(tail in name for tail in tail_metrics) else threshold
+        rows.append({"metric": name, "baseline": before, "current": value,
+                     "worse_by": change, "regression": change > allowed})
+    return rows
+
+
+def print_results(report):
+    for name, value in report["results"].items():
+        print(f"  {name:<32} {value:>14,.2f}")
+
+
+def print_comparison(rows, threshold):
+    print(f"  {'metric':<32} {'baseline':>14} {'current':>14} {'worse by':>9}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(f"  {row['metric']:<32} {row['baseline']:>14,.2f} {row['current']:>14,.2f} {row['worse_by']:>+9.1%}{flag}")
+    regressions = [row for row in rows if row["regression"]]
+    print(f"{len(regressions)} metric(s) worse than baseline by more than {threshold:.0%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup, rerun, prediction latency, throughput and memory benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_cmd = sub.add_parser("run", help="Run the suite on a synthetic or sampled dataset")
+    run_cmd.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    run_cmd.add_argument("--data", help="Sample rows from this CSV instead of generating them")
+    run_cmd.add_argument("--seed", type=int, default=0)
+    run_cmd.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Processes per measurement; the median is kept")
+    run_cmd.add_argument("--workdir", help="Keep the generated dataset and model here")
+    run_cmd.add_argument("--output", help="Write the results as JSON")
+    run_cmd.add_argument("--baseline", help="Earlier JSON results to compare against")
+    compare_cmd = sub.add_parser("compare", help="Compare two JSON result files")
+    compare_cmd.add_argument("current")
+    compare_cmd.add_argument("baseline")
+    for cmd in (run_cmd, compare_cmd):
+        cmd.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed relative slowdown")
+    measure_cmd = sub.add_parser("measure")
+    measure_cmd.add_argument("name", choices=list(measurements))
+    for cmd in (run_cmd, measure_cmd):
+        cmd.add_argument("--reruns", type=int, default=DEFAULT_RERUNS)
+        cmd.add_argument("--single-repeat", type=int, default=DEFAULT_SINGLE_REPEAT)
+    args = parser.parse_args()
+
+    if args.command == "measure":
+        print(json.dumps(measurements[args.name](args)))
+        return
+
+    if args.command == "run":
+        report = run_suite(args)
+        print_results(report)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=1)
+        if not args.baseline:
+            return
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    else:
+        with open(args.current, encoding="utf-8") as f:
+            report = json.load(f)
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    if print_comparison(compare(report, baseline, args.threshold), args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
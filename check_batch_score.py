@@ -0,0 +1,83 @@
+import argparse
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from batch_score import PRICE_COLUMN, ChunkWriter, score_file
+from parallel_score import score_file_parallel
+from resources import MODEL_PATH, load_model
+
+# One query column in the dtypes separately parsed CSV chunks can come back in
+mixed_chunks = [
+    pd.DataFrame({'days_left': [1, 2], 'airline': ['Indigo', 'Vistara'], 'price': [1.5, 2.5]}),
+    pd.DataFrame({'days_left': [3.0, np.nan], 'airline': ['SpiceJet', None], 'price': [3.5, 4.5]}),
+    pd.DataFrame({'days_left': ['4', 'abc'], 'airline': [7, 8], 'price': [5.5, 6.5]}),
+]
+
+
+def check_mixed_chunks(directory):
+    # Every chunk must land in one Parquet file with the first chunk's schema
+    path = os.path.join(directory, "mixed.parquet")
+    writer = ChunkWriter(path)
+    for chunk in mixed_chunks:
+        writer.write(chunk)
+    writer.close()
+    written = pd.read_parquet(path)
+    return (
+        np.array_equal(written['days_left'].to_numpy(dtype=float), [1, 2, 3, np.nan, 4, np.nan], equal_nan=True)
+        and written['airline'].tolist() == ['Indigo', 'Vistara', 'SpiceJet', None, '7', '8']
+        and written['price'].tolist() == [1.5, 2.5, 3.5, 4.5, 5.5, 6.5]
+    )
+
+
+def check_csv_to_parquet(directory, model, rows=2000, chunksize=300):
+    # End to end: a CSV whose chunks parse differently, scored into Parquet
+    rng = np.random.default_rng(0)
+    queries = pd.DataFrame({
+        'airline': rng.choice(['Indigo', 'SpiceJet', 'GO_FIRST'], rows),
+        'source_city': 'Delhi',
+        'destination_city': 'Mumbai',
+        'departure_time': 'Morning',
+        'arrival_time': 'Night',
+        'stops': rng.integers(0, 3, rows),
+        'duration_mins': rng.integers(60, 600, rows),
+        'days_left': rng.integers(1, 50, rows).astype(object),
+        'class': 'Economy',
+    })
+    queries.loc[rows // 2, 'days_left'] = ''
+    queries.loc[rows - 10, 'days_left'] = 'abc'
+    input_path = os.path.join(directory, "queries.csv")
+    output_path = os.path.join(directory, "scored.parquet")
+    queries.to_csv(input_path, index=False)
+    stats = score_file(input_path, output_path, model=model, chunksize=chunksize)
+    scored = pd.read_parquet(output_path)
+    if not (len(scored) == rows and stats["unscored_rows"] == 2 and scored[PRICE_COLUMN].isna().sum() == 2):
+        return False
+
+    # Workers score their own byte ranges into part files; joined, they must equal the serial output
+    parallel_path = os.path.join(directory, "scored_parallel.parquet")
+    parallel_stats = score_file_parallel(input_path, parallel_path, model=model, workers=2, chunksize=chunksize)
+    parallel = pd.read_parquet(parallel_path)
+    return parallel_stats["unscored_rows"] == 2 and parallel.equals(scored)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that batch scoring writes mixed-dtype CSV chunks to Parquet")
+    parser.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="flight_check_") as directory:
+        results = {
+            "mixed chunks": check_mixed_chunks(directory),
+            "csv -> parquet (serial and parallel)": check_csv_to_parquet(directory, load_model(args.model)),
+        }
+    for name, ok in results.items():
+        print(f"{name:<37} {'ok' if ok else 'FAILED'}")
+    if not all(results.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
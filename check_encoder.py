@@ -0,0 +1,92 @@
+import argparse
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from features import (
+    FeatureEncoder, airlines, arrival_times, business_airlines, categorize_booking_type, categorize_duration, cities,
+    classes, departure_times, determine_airline_tier, is_cross_region, is_peak_departure, is_red_eye,
+    max_days_left, min_days_left, model_columns, query_fields, stops_options
+)
+
+
+def reference_encode(query):
+    # The original app's path: a dict of every column, one DataFrame, reindexed to model_columns
+    airline, source, destination, departure, arrival, stops, duration_mins, days_left, flight_class = (
+        query[field] for field in query_fields
+    )
+    features_full = {
+        'stops': stops,
+        'days_left': days_left,
+        'duration_mins': duration_mins,
+        'red_eye': is_red_eye(departure, arrival),
+        'is_peak_departure': is_peak_departure(departure),
+        'cross_region': is_cross_region(source, destination),
+        'days_duration_interaction': days_left * duration_mins,
+        'stops_per_hour': stops / (duration_mins / 60) if duration_mins > 0 else 0,
+        f'airline_{airline}': 1,
+        f'source_city_{source}': 1,
+        f'destination_city_{destination}': 1,
+        f'departure_time_{departure}': 1,
+        f'arrival_time_{arrival}': 1,
+        f'class_{flight_class}': 1,
+        f'airline_tier_{determine_airline_tier(airline)}': 1,
+        f'booking_type_{categorize_booking_type(days_left)}': 1,
+        f'duration_category_{categorize_duration(duration_mins)}': 1,
+    }
+    return pd.DataFrame([features_full]).reindex(columns=model_columns, fill_value=0).to_numpy(dtype=np.float64)
+
+
+def random_queries(n, seed=0):
+    # Every option, plus durations and days_left on and around the helpers' thresholds
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        source, destination = rng.sample(cities, 2)
+        airline = rng.choice(airlines)
+        queries.append({
+            'airline': airline,
+            'source_city': source,
+            'destination_city': destination,
+            'departure_time': rng.choice(departure_times),
+            'arrival_time': rng.choice(arrival_times),
+            'stops': rng.choice(stops_options),
+            'duration_mins': rng.choice([0, 31, 179, 180, 181, rng.randint(0, 2000)]),
+            'days_left': rng.randint(min_days_left, max_days_left),
+            'class': rng.choice(classes) if airline in business_airlines else 'Economy',
+        })
+    return queries
+
+
+def check_parity(queries, encoder=None):
+    # encode and encode_batch must both match the reference path bit for bit
+    encoder = encoder or FeatureEncoder()
+    expected = np.vstack([reference_encode(query) for query in queries])
+    paths = {
+        "encode": np.vstack([encoder.encode(query) for query in queries]),
+        "encode_batch": encoder.encode_batch(pd.DataFrame(queries)),
+    }
+    return {name: bool(np.array_equal(X, expected)) for name, X in paths.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check FeatureEncoder against the original dict/DataFrame encoding")
+    parser.add_argument("--queries", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    queries = random_queries(args.queries, args.seed)
+    start = time.perf_counter()
+    parity = check_parity(queries)
+    for name, identical in parity.items():
+        print(f"{name:<13} {'identical' if identical else 'MISMATCH'} over {len(queries):,} queries")
+    print(f"checked in {time.perf_counter() - start:.2f}s")
+
+    if not all(parity.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
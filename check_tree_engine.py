@@ -0,0 +1,75 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from features import FeatureEncoder, model_columns, normalize_queries
+from resources import DATASET_PATH, MODEL_PATH, load_historical_df, load_model
+from tree_engine import FlatTree
+
+
+def _seconds_per_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def sklearn_predict(model, X):
+    return model.predict(pd.DataFrame(X, columns=model_columns))
+
+
+def check_parity(model, X):
+    # Every evaluation path must match model.predict bit for bit
+    expected = sklearn_predict(model, X)
+    engine = FlatTree.from_model(model)
+    arrays_only = engine.detached()
+    paths = {
+        "kernel": engine.predict(X),
+        "vectorized": arrays_only.value[arrays_only._traverse(np.ascontiguousarray(X, dtype=np.float32))],
+        "python_walk": arrays_only.value[arrays_only._walk(np.ascontiguousarray(X, dtype=np.float32))],
+    }
+    return {name: bool(np.array_equal(prices, expected)) for name, prices in paths.items()}
+
+
+def benchmark(model, X, single_repeat=2000, batch_repeat=3):
+    engine = FlatTree.from_model(model)
+    paths = {
+        "sklearn model.predict": lambda x: sklearn_predict(model, x),
+        "FlatTree (sklearn kernel)": engine.predict,
+        "FlatTree (arrays only)": engine.detached().predict,
+    }
+    results = {}
+    for name, predict in paths.items():
+        single = _seconds_per_call(lambda: predict(X[:1]), single_repeat)
+        batch = _seconds_per_call(lambda: predict(X), batch_repeat)
+        results[name] = {"single_row_us": single * 1e6, "batch_rows_per_sec": len(X) / batch}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the flat tree engine against model.predict and time both")
+    parser.add_argument("--dataset", default=DATASET_PATH)
+    parser.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    X = FeatureEncoder().encode_batch(normalize_queries(load_historical_df(args.dataset)))
+
+    parity = check_parity(model, X)
+    for name, identical in parity.items():
+        print(f"{name:<12} {'identical' if identical else 'MISMATCH'} over {len(X):,} rows")
+
+    results = benchmark(model, X)
+    baseline = results["sklearn model.predict"]["single_row_us"]
+    print(f"\n{'path':<28} {'single row':>12} {'speedup':>8} {'batch rows/sec':>16}")
+    for name, r in results.items():
+        print(f"{name:<28} {r['single_row_us']:>10.1f}us {baseline / r['single_row_us']:>7.1f}x {r['batch_rows_per_sec']:>16,.0f}")
+
+    if not all(parity.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
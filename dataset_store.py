@@ -0,0 +1,129 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pandas as pd
+import psutil
+import pyarrow as pa
+import pyarrow.feather as feather
+
+DATASET_PATH = "Clean_Dataset.csv"
+STORE_PATH = "Clean_Dataset.arrow"
+
+
+def store_path_for(csv_path):
+    # Clean_Dataset.csv -> Clean_Dataset.arrow, next to the CSV it was converted from
+    return os.path.splitext(csv_path)[0] + ".arrow"
+
+# Columns the app and its indexes read; 'flight' and the CSV's index column are left out
+app_columns = [
+    'airline', 'source_city', 'departure_time', 'stops', 'arrival_time',
+    'destination_city', 'class', 'duration', 'days_left', 'price'
+]
+
+category_columns = ['airline', 'source_city', 'departure_time', 'stops', 'arrival_time', 'destination_city', 'class']
+
+
+def convert(csv_path=DATASET_PATH, store_path=STORE_PATH):
+    df = pd.read_csv(csv_path)
+    df.columns = df.columns.str.strip()
+    df = df[[col for col in df.columns if not col.startswith('Unnamed')]]
+
+    for col in category_columns:
+        df[col] = df[col].astype('category')
+    for col in ['days_left', 'price']:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    # duration stays float64, the dtype the app uses, so reading it needs no conversion
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # Uncompressed and in a single record batch, every column maps straight
+    # onto the file's pages instead of being concatenated into new memory
+    feather.write_feather(table, store_path, compression='uncompressed', chunksize=max(table.num_rows, 1))
+    return table.num_rows
+
+
+def read_historical(store_path=STORE_PATH, columns=app_columns):
+    # Numeric columns and category codes are read-only views of the memory
+    # map, so processes loading the same file share its page-cache pages
+    # (feather.read_table with a column list copies the columns it reads)
+    with pa.memory_map(store_path) as source:
+        table = pa.ipc.open_file(source).read_all().select(columns)
+    return table.to_pandas(split_blocks=True)
+
+
+def _memory():
+    # RSS and its anonymous part; file-backed pages (shared) can be shared with other processes
+    info = psutil.Process().memory_info()
+    return info.rss, info.rss - info.shared
+
+
+def _touch(df):
+    # Page every column in so mapped data shows up in RSS too
+    for col in df:
+        values = df[col].array.codes if isinstance(df[col].dtype, pd.CategoricalDtype) else df[col].to_numpy()
+        if values.dtype != object:
+            values.max(initial=0)
+
+
+def _measure(source, path):
+    # Runs in a fresh interpreter so each loader starts from the same baseline
+    rss_before, anon_before = _memory()
+    start = time.perf_counter()
+    if source == "csv":
+        df = pd.read_csv(path)
+        df.columns = df.columns.str.strip()
+    else:
+        df = read_historical(path)
+    elapsed = time.perf_counter() - start
+    _touch(df)
+    rss, anon = _memory()
+    # RSS includes the mapped file's pages, which every process reading the
+    # file shares; the anonymous part is what each process holds on its own
+    return {"source": source, "rows": len(df), "load_seconds": elapsed,
+            "rss_delta_bytes": rss - rss_before, "anon_delta_bytes": anon - anon_before}
+
+
+def report(csv_path=DATASET_PATH, store_path=STORE_PATH):
+    results = []
+    for source, path in [("csv", csv_path), ("arrow", store_path)]:
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "measure", source, path],
+            check=True, capture_output=True, text=True
+        ).stdout
+        results.append(json.loads(out))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar, memory-mappable copy of the historical dataset")
+    sub = parser.add_subparsers(dest="command", required=True)
+    convert_cmd = sub.add_parser("convert", help="Write the CSV out as an Arrow file")
+    report_cmd = sub.add_parser("report", help="Compare load time and RSS of the CSV and the Arrow file")
+    for cmd in (convert_cmd, report_cmd):
+        cmd.add_argument("--csv", default=DATASET_PATH)
+        cmd.add_argument("--store", help="Arrow file to write or read (default: the CSV path with .arrow)")
+    measure_cmd = sub.add_parser("measure")
+    measure_cmd.add_argument("source", choices=["csv", "arrow"])
+    measure_cmd.add_argument("path")
+    args = parser.parse_args()
+    if args.command != "measure" and args.store is None:
+        args.store = store_path_for(args.csv)
+
+    if args.command == "convert":
+        rows = convert(args.csv, args.store)
+        print(f"Wrote {rows:,} rows to {args.store} ({os.path.getsize(args.store) / 1e6:.1f} MB, "
+              f"CSV {os.path.getsize(args.csv) / 1e6:.1f} MB)")
+    elif args.command == "report":
+        print(f"{'source':<8} {'rows':>10} {'load ms':>9} {'RSS delta MB':>13} {'anon MB':>11}")
+        for r in report(args.csv, args.store):
+            print(f"{r['source']:<8} {r['rows']:>10,} {r['load_seconds'] * 1000:>9.1f} "
+                  f"{r['rss_delta_bytes'] / 1e6:>13.1f} {r['anon_delta_bytes'] / 1e6:>11.1f}")
+    else:
+        print(json.dumps(_measure(args.source, args.path)))
+
+
+if __name__ == "__main__":
+    main()
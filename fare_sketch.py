@@ -0,0 +1,52 @@
+import numpy as np
+
+group_columns = ['source_city', 'destination_city', 'class', 'airline']
+
+# Percentile grid kept per group: 0th, 1st, ..., 100th
+sketch_levels = np.linspace(0, 1, 101)
+
+
+class FareSketches:
+    """Per-(source, destination, class, airline) fare quantile sketches.
+
+    Each group keeps 101 quantiles in one float32 row, so ranking a price is a
+    dict lookup plus an interpolation over 101 values.
+    """
+
+    def __init__(self, keys, quantiles, counts):
+        self.rows = {key: i for i, key in enumerate(keys)}
+        self.quantiles = quantiles
+        self.counts = counts
+
+    @classmethod
+    def build(cls, historical_df):
+        grouped = historical_df.groupby(group_columns, observed=True)['price']
+        table = grouped.quantile(sketch_levels).unstack()
+        counts = grouped.size().reindex(table.index)
+        keys = [tuple(key) for key in table.index]
+        return cls(keys, table.to_numpy(dtype=np.float32), counts.to_numpy())
+
+    def percentile(self, price, source, destination, flight_class, airline):
+        # Share (0-100) of historical fares in the group at or below price,
+        # or None when the group has no history
+        row = self.rows.get((source, destination, flight_class, airline))
+        if row is None:
+            return None
+        q = self.quantiles[row]
+        if price < q[0]:
+            return 0.0
+        if price >= q[-1]:
+            return 100.0
+        # Right-most grid point at or below price, then interpolate to the next
+        i = np.searchsorted(q, price, side='right') - 1
+        low, high = q[i], q[i + 1]
+        fraction = (price - low) / (high - low) if high > low else 1.0
+        return float((i + fraction) * 100 / (len(q) - 1))
+
+    def cheaper_than(self, price, source, destination, flight_class, airline):
+        rank = self.percentile(price, source, destination, flight_class, airline)
+        return None if rank is None else 100.0 - rank
+
+    def count(self, source, destination, flight_class, airline):
+        row = self.rows.get((source, destination, flight_class, airline))
+        return 0 if row is None else int(self.counts[row])
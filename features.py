@@ -0,0 +1,297 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Model columns
+model_columns = [
+    'stops', 'days_left', 'duration_mins', 'red_eye', 'is_peak_departure', 'cross_region',
+    'days_duration_interaction', 'stops_per_hour',
+    'airline_AirAsia', 'airline_Air_India', 'airline_GO_FIRST', 'airline_Indigo', 'airline_SpiceJet', 'airline_Vistara',
+    'source_city_Bangalore', 'source_city_Chennai', 'source_city_Delhi', 'source_city_Hyderabad', 'source_city_Kolkata', 'source_city_Mumbai',
+    'departure_time_Afternoon', 'departure_time_Early_Morning', 'departure_time_Evening', 'departure_time_Late_Night', 'departure_time_Morning', 'departure_time_Night',
+    'arrival_time_Afternoon', 'arrival_time_Early_Morning', 'arrival_time_Evening', 'arrival_time_Late_Night', 'arrival_time_Morning', 'arrival_time_Night',
+    'destination_city_Bangalore', 'destination_city_Chennai', 'destination_city_Delhi', 'destination_city_Hyderabad', 'destination_city_Kolkata', 'destination_city_Mumbai',
+    'class_Business', 'class_Economy',
+    'airline_tier_High-Cost', 'airline_tier_Low-cost',
+    'booking_type_Advance', 'booking_type_Last_Minute', 'booking_type_Near',
+    'duration_category_Long', 'duration_category_Medium'
+]
+
+# Helper functions
+def categorize_booking_type(days_left):
+    if days_left <= 3:
+        return 'Last_Minute'
+    elif days_left <= 20:
+        return 'Near'
+    else:
+        return 'Advance'
+
+def determine_airline_tier(airline):
+    return 'High-Cost' if airline in ['Vistara', 'Air_India'] else 'Low-cost'
+
+def is_red_eye(departure_time, arrival_time):
+    return int(departure_time in ['Late_Night', 'Night'] and arrival_time in ['Early_Morning', 'Morning'])
+
+def is_peak_departure(departure_time):
+    return int(departure_time in ['Morning', 'Early_Morning'])
+
+def categorize_duration(duration_mins):
+    return 'Medium' if duration_mins < 180 else 'Long'
+
+@lru_cache(maxsize=None)
+def is_cross_region(source, destination):
+    return int(region_map[source] != region_map[destination])
+
+# Region mapping
+region_map = {
+    'Delhi': 'North', 'Mumbai': 'West', 'Bangalore': 'South',
+    'Kolkata': 'East', 'Hyderabad': 'South', 'Chennai': 'South'
+}
+
+# Data options
+airlines = ['AirAsia', 'Air_India', 'GO_FIRST', 'Indigo', 'SpiceJet', 'Vistara']
+cities = ['Bangalore', 'Chennai', 'Delhi', 'Hyderabad', 'Kolkata', 'Mumbai']
+departure_times = ['Afternoon', 'Early_Morning', 'Evening', 'Late_Night', 'Morning', 'Night']
+arrival_times = ['Afternoon', 'Early_Morning', 'Evening', 'Late_Night', 'Morning', 'Night']
+classes = ['Economy', 'Business']
+stops_options = [0, 1, 2, 3, 4, 5]
+
+
+# Raw query fields understood by FeatureEncoder, named like the dataset columns
+query_fields = [
+    'airline', 'source_city', 'destination_city', 'departure_time', 'arrival_time',
+    'stops', 'duration_mins', 'days_left', 'class'
+]
+
+# One-hot groups: (column prefix, query field, known values)
+one_hot_groups = [
+    ('airline', 'airline', airlines),
+    ('source_city', 'source_city', cities),
+    ('destination_city', 'destination_city', cities),
+    ('departure_time', 'departure_time', departure_times),
+    ('arrival_time', 'arrival_time', arrival_times),
+    ('class', 'class', classes),
+]
+
+stops_labels = {'zero': 0, 'one': 1, 'two_or_more': 2}
+numeric_fields = ['stops', 'duration_mins', 'days_left']
+
+# Rules of the prediction form, which the service and batch scoring apply too:
+# durations of 30 minutes or less are rejected, days_left is a 0-60 slider,
+# and only these airlines sell Business class
+min_duration_mins = 30
+min_days_left, max_days_left = 0, 60
+business_airlines = ['Air_India', 'Vistara']
+
+
+def normalize_queries(df, errors='raise'):
+    # Accept rows shaped like Clean_Dataset.csv (stops as labels, duration in
+    # hours) as well as already-numeric queries. With errors='coerce', missing
+    # or unparseable values are left as NaN for invalid_queries to flag
+    # instead of failing the whole frame.
+    df = df.copy()
+    df.columns = df.columns.str.strip()
+    if 'duration' in df:
+        from_hours = (pd.to_numeric(df['duration'], errors=errors) * 60).round()
+        df['duration_mins'] = df['duration_mins'].fillna(from_hours) if 'duration_mins' in df else from_hours
+    missing = [field for field in query_fields if field not in df]
+    if missing:
+        raise ValueError(f"Missing query columns: {missing}")
+    if errors == 'raise':
+        incomplete = [field for field in query_fields if df[field].isna().any()]
+        if incomplete:
+            raise ValueError(f"Missing values in query columns: {incomplete}")
+    if df['stops'].dtype == object or isinstance(df['stops'].dtype, pd.CategoricalDtype):
+        df['stops'] = df['stops'].astype(object).map(lambda v: stops_labels.get(v, v))
+        if errors == 'raise':
+            df['stops'] = df['stops'].astype(int)
+    if errors == 'coerce':
+        for field in numeric_fields:
+            df[field] = pd.to_numeric(df[field], errors='coerce')
+    return df
+
+
+def normalize_query(query):
+    # One query as normalize_queries(df, errors='coerce') would leave it,
+    # without the cost of building a frame
+    query = dict(query)
+    if isinstance(query.get('stops'), str):
+        query['stops'] = stops_labels.get(query['stops'], query['stops'])
+    for field in numeric_fields:
+        if field in query:
+            query[field] = pd.to_numeric(query[field], errors='coerce')
+    return query
+
+
+def invalid_queries(queries):
+    # Boolean mask per reason a row cannot be priced; a row may fail several.
+    # queries: normalized DataFrame or dict of arrays, as for encode_batch
+    columns = {field: np.asarray(queries[field]) for field in query_fields}
+    present = {field: ~pd.isna(values) for field, values in columns.items()}
+    problems = {}
+    for field in query_fields:
+        label = "missing or non-numeric" if field in numeric_fields else "missing"
+        problems[f"{label} {field}"] = ~present[field]
+    for _, field, values in one_hot_groups:
+        problems[f"unknown {field}"] = present[field] & ~np.isin(columns[field], values)
+
+    numbers = {field: np.where(present[field], columns[field], 0).astype(np.float64) for field in numeric_fields}
+    problems["stops must be one of the form's options"] = present['stops'] & ~np.isin(numbers['stops'], stops_options)
+    problems[f"duration_mins must be more than {min_duration_mins}"] = present['duration_mins'] & (numbers['duration_mins'] <= min_duration_mins)
+    problems[f"days_left must be between {min_days_left} and {max_days_left}"] = present['days_left'] & (
+        (numbers['days_left'] < min_days_left) | (numbers['days_left'] > max_days_left)
+    )
+    problems["source_city and destination_city must differ"] = columns['source_city'] == columns['destination_city']
+    problems[f"Business class is only sold by {business_airlines}"] = (
+        (columns['class'] == 'Business') & ~np.isin(columns['airline'], business_airlines)
+    )
+    return {reason: mask for reason, mask in problems.items() if mask.any()}
+
+
+def valid_queries(queries):
+    valid = np.ones(len(queries), dtype=bool)
+    for mask in invalid_queries(queries).values():
+        valid &= ~mask
+    return valid
+
+
+def _label_codes(labels):
+    # Labels -> (code per label, sorted distinct labels)
+    values = sorted(set(labels))
+    return np.array([values.index(label) for label in labels], dtype=np.intp), values
+
+
+def _map_values(rule, values):
+    # Applies a scalar rule once per distinct value rather than once per row
+    uniques, inverse = np.unique(values, return_inverse=True)
+    codes, labels = _label_codes([rule(value) for value in uniques.tolist()])
+    return codes[inverse], labels
+
+
+class FeatureEncoder:
+    # Column positions are resolved once, so encoding is plain array writes.
+    # Like reindex(columns=..., fill_value=0), one-hot values without a column
+    # are dropped and columns that are never set stay 0.
+
+    def __init__(self, columns=model_columns):
+        self.columns = list(columns)
+        self.positions = {col: i for i, col in enumerate(self.columns)}
+        self._vocabularies = {}
+        self._group_positions = {}
+        # The helper rules evaluated once per option (or option pair), so
+        # encode_batch looks values up by code and always agrees with encode
+        self._red_eye = np.array([[is_red_eye(d, a) for a in arrival_times] for d in departure_times])
+        self._peak_departure = np.array([is_peak_departure(d) for d in departure_times])
+        self._cross_region = np.array([[is_cross_region(s, d) for d in cities] for s in cities])
+        self._airline_tier = _label_codes([determine_airline_tier(a) for a in airlines])
+
+    def _position(self, column):
+        return self.positions.get(column, -1)
+
+    def _set(self, row, column, value):
+        pos = self.positions.get(column)
+        if pos is not None:
+            row[pos] = value
+
+    def encode(self, query):
+        airline = query['airline']
+        source = query['source_city']
+        destination = query['destination_city']
+        departure = query['departure_time']
+        arrival = query['arrival_time']
+        stops = query['stops']
+        duration_mins = query['duration_mins']
+        days_left = query['days_left']
+        for _, field, values in one_hot_groups:
+            if query[field] not in values:
+                raise ValueError(f"Unknown {field}: {query[field]!r}")
+
+        row = np.zeros((1, len(self.columns)))
+        x = row[0]
+        self._set(x, 'stops', stops)
+        self._set(x, 'days_left', days_left)
+        self._set(x, 'duration_mins', duration_mins)
+        self._set(x, 'red_eye', is_red_eye(departure, arrival))
+        self._set(x, 'is_peak_departure', is_peak_departure(departure))
+        self._set(x, 'cross_region', is_cross_region(source, destination))
+        self._set(x, 'days_duration_interaction', days_left * duration_mins)
+        self._set(x, 'stops_per_hour', stops / (duration_mins / 60) if duration_mins > 0 else 0)
+
+        self._set(x, f'airline_{airline}', 1)
+        self._set(x, f'source_city_{source}', 1)
+        self._set(x, f'destination_city_{destination}', 1)
+        self._set(x, f'departure_time_{departure}', 1)
+        self._set(x, f'arrival_time_{arrival}', 1)
+        self._set(x, f'class_{query["class"]}', 1)
+        self._set(x, f'airline_tier_{determine_airline_tier(airline)}', 1)
+        self._set(x, f'booking_type_{categorize_booking_type(days_left)}', 1)
+        self._set(x, f'duration_category_{categorize_duration(duration_mins)}', 1)
+        return row
+
+    def _codes(self, field, labels, values):
+        # Map category labels to their index in values; unknown labels are an error
+        key = tuple(values)
+        index = self._vocabularies.get(key)
+        if index is None:
+            index = self._vocabularies[key] = pd.Index(values)
+        codes = index.get_indexer(labels)
+        if (codes < 0).any():
+            unknown = sorted(set(np.asarray(labels, dtype=object)[codes < 0]))
+            raise ValueError(f"Unknown {field}: {unknown}")
+        return codes
+
+    def _set_one_hot(self, X, prefix, codes, values):
+        key = (prefix, tuple(values))
+        positions = self._group_positions.get(key)
+        if positions is None:
+            positions = self._group_positions[key] = np.array([self._position(f'{prefix}_{v}') for v in values], dtype=np.intp)
+        cols = positions[codes]
+        rows = np.flatnonzero(cols >= 0)
+        X[rows, cols[rows]] = 1
+
+    def _set_column(self, X, column, values):
+        pos = self.positions.get(column)
+        if pos is not None:
+            X[:, pos] = values
+
+    def encode_batch(self, queries):
+        # queries: DataFrame or dict of arrays with the query_fields keys
+        codes = {
+            field: self._codes(field, np.asarray(queries[field], dtype=object), values)
+            for _, field, values in one_hot_groups
+        }
+        stops = np.asarray(queries['stops'], dtype=np.float64)
+        duration_mins = np.asarray(queries['duration_mins'], dtype=np.float64)
+        days_left = np.asarray(queries['days_left'], dtype=np.float64)
+
+        X = np.zeros((len(stops), len(self.columns)))
+        for prefix, field, values in one_hot_groups:
+            self._set_one_hot(X, prefix, codes[field], values)
+
+        departure = codes['departure_time']
+        arrival = codes['arrival_time']
+        self._set_column(X, 'stops', stops)
+        self._set_column(X, 'days_left', days_left)
+        self._set_column(X, 'duration_mins', duration_mins)
+        self._set_column(X, 'red_eye', self._red_eye[departure, arrival])
+        self._set_column(X, 'is_peak_departure', self._peak_departure[departure])
+        self._set_column(X, 'cross_region', self._cross_region[codes['source_city'], codes['destination_city']])
+        self._set_column(X, 'days_duration_interaction', days_left * duration_mins)
+        stops_per_hour = np.zeros(len(X))
+        np.divide(stops, duration_mins / 60, out=stops_per_hour, where=duration_mins > 0)
+        self._set_column(X, 'stops_per_hour', stops_per_hour)
+
+        # Derived categories, as codes into their sorted labels
+        tier_codes, tiers = self._airline_tier
+        self._set_one_hot(X, 'airline_tier', tier_codes[codes['airline']], tiers)
+        self._set_one_hot(X, 'booking_type', *_map_values(categorize_booking_type, days_left))
+        self._set_one_hot(X, 'duration_category', *_map_values(categorize_duration, duration_mins))
+        return X
+
+    def predict(self, model, X):
+        # Models fitted on a DataFrame warn when given a bare array, so name the
+        # columns; building a frame from a 2-D array is a single block copy.
+        if hasattr(model, 'feature_names_in_'):
+            X = pd.DataFrame(X, columns=self.columns)
+        return model.predict(X)
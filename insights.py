@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from features import airlines, categorize_booking_type, determine_airline_tier, max_days_left, min_days_left
+
+# Range of the form's days_left slider
+booking_days = np.arange(min_days_left, max_days_left + 1)
+
+
+def _repeat_query(query, n):
+    return {field: [value] * n for field, value in query.items()}
+
+
+def booking_curve(model, encoder, query, days=booking_days):
+    # One row per days_left value, scored in a single predict call;
+    # booking_type and days_duration_interaction follow days_left per row
+    queries = _repeat_query(query, len(days))
+    queries['days_left'] = days
+    prices = encoder.predict(model, encoder.encode_batch(queries))
+    return pd.DataFrame({'days_left': days, 'price': prices})
+
+
+def cheapest_day(curve):
+    return curve.loc[curve['price'].idxmin()]
+
+
+# First days_left value categorize_booking_type treats as an Advance booking
+advance_days_left = next(d for d in range(min_days_left, max_days_left + 1) if categorize_booking_type(d) == 'Advance')
+
+low_cost_airlines = [a for a in airlines if determine_airline_tier(a) == 'Low-cost']
+
+
+def _what_if_scenarios(query):
+    # (tip text, counterfactual query, group) triples for the tips that apply;
+    # only the cheapest scenario of each group becomes a tip
+    scenarios = []
+    if query['class'] == 'Business':
+        scenarios.append(("✈️ Flying Economy class instead", {**query, 'class': 'Economy'}, 'class'))
+    if categorize_booking_type(query['days_left']) != 'Advance':
+        scenarios.append((f"📅 Booking {advance_days_left}+ days ahead", {**query, 'days_left': advance_days_left}, 'days'))
+    if determine_airline_tier(query['airline']) == 'High-Cost':
+        # Low-cost airlines only sell Economy, so a Business query changes class too
+        suffix = " Economy" if query['class'] == 'Business' else ""
+        for airline in low_cost_airlines:
+            scenarios.append((f"💰 Flying {airline}{suffix} instead", {**query, 'airline': airline, 'class': 'Economy'}, 'airline'))
+    return scenarios
+
+
+def price_with_tips(model, encoder, query):
+    # The query and every counterfactual are scored in one predict call
+    scenarios = _what_if_scenarios(query)
+    queries = pd.DataFrame([query] + [alternative for _, alternative, _ in scenarios])
+    prices = encoder.predict(model, encoder.encode_batch(queries))
+    price = prices[0]
+
+    best = {}
+    for (text, _, group), alternative_price in zip(scenarios, prices[1:]):
+        if alternative_price < price and (group not in best or alternative_price < best[group][1]):
+            best[group] = (text, alternative_price)
+    tips = [{'text': text, 'savings': price - alternative_price} for text, alternative_price in best.values()]
+    tips.sort(key=lambda tip: tip['savings'], reverse=True)
+    if not tips:
+        tips.append({'text': "🎉 Your flight details look optimized for the best price!", 'savings': None})
+    return price, tips
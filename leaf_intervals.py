@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+interval_quantiles = {'p10': 0.10, 'p50': 0.50, 'p90': 0.90}
+
+
+class LeafIntervals:
+    """Fare quantiles of the training rows that land in each leaf of the tree.
+
+    Tables are indexed by node id, so a prediction's band is one ``apply``
+    plus an array lookup.
+    """
+
+    def __init__(self, engine, quantiles, counts):
+        self.engine = engine
+        self.quantiles = quantiles
+        self.counts = counts
+
+    @classmethod
+    def build(cls, engine, X, prices):
+        leaves = engine.apply(X)
+        node_count = len(engine.value)
+        stats = pd.Series(np.asarray(prices, dtype=np.float64)).groupby(leaves).quantile(list(interval_quantiles.values())).unstack()
+        quantiles = {}
+        for name, level in interval_quantiles.items():
+            table = np.full(node_count, np.nan)
+            table[stats.index.to_numpy()] = stats[level].to_numpy()
+            quantiles[name] = table
+        return cls(engine, quantiles, np.bincount(leaves, minlength=node_count))
+
+    def lookup(self, leaves):
+        return {'count': self.counts[leaves], **{name: table[leaves] for name, table in self.quantiles.items()}}
+
+    def predict(self, X):
+        # Point prediction and band from the same leaf ids
+        leaves = self.engine.apply(X)
+        return {'price': self.engine.value[leaves], **self.lookup(leaves)}
@@ -0,0 +1,81 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import numpy as np
+from tornado.httpclient import AsyncHTTPClient, HTTPRequest
+
+from features import airlines, arrival_times, business_airlines, cities, classes, departure_times
+from service import DEFAULT_PORT
+
+
+def random_query(rng):
+    source, destination = rng.sample(cities, 2)
+    airline = rng.choice(airlines)
+    return {
+        'airline': airline,
+        'source_city': source,
+        'destination_city': destination,
+        'departure_time': rng.choice(departure_times),
+        'arrival_time': rng.choice(arrival_times),
+        'stops': rng.choice([0, 1, 2]),
+        'duration_mins': rng.randint(45, 1800),
+        'days_left': rng.randint(0, 60),
+        'class': rng.choice(classes) if airline in business_airlines else 'Economy',
+    }
+
+
+async def run_level(url, concurrency, requests, seed=0):
+    rng = random.Random(seed)
+    bodies = [json.dumps(random_query(rng)) for _ in range(requests)]
+    client = AsyncHTTPClient(force_instance=True, max_clients=concurrency)
+    latencies = []
+    errors = 0
+    next_body = iter(bodies)
+
+    async def worker():
+        nonlocal errors
+        for body in next_body:
+            start = time.perf_counter()
+            response = await client.fetch(HTTPRequest(url, method="POST", body=body), raise_error=False)
+            latencies.append(time.perf_counter() - start)
+            errors += response.code != 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    client.close()
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "throughput": requests / elapsed,
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+    }
+
+
+async def run(url, levels, requests):
+    # A fresh seed per level so later levels are not all prediction cache hits
+    return [await run_level(url, concurrency, requests, seed=concurrency) for concurrency in levels]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the prediction service at several concurrency levels")
+    parser.add_argument("--url", default=f"http://127.0.0.1:{DEFAULT_PORT}/predict")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per concurrency level")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.url, args.concurrency, args.requests))
+    print(f"{'conc':>6} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for r in results:
+        print(f"{r['concurrency']:>6} {r['throughput']:>10,.0f} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
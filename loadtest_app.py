@@ -0,0 +1,190 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import numpy as np
+import psutil
+
+from bench_reruns import INR_LABEL, SUBMIT_LABEL, free_port, start_server, wait_ready
+from features import airlines, arrival_times, cities, departure_times, stops_options
+from st_client import AppSession
+
+DEFAULT_SESSIONS = [1, 5, 20]
+DEFAULT_STEPS = 20
+
+# Relative frequency of each step in a simulated visit
+step_weights = {
+    "change route": 3,
+    "change airline": 2,
+    "change stops": 2,
+    "submit form": 3,
+    "toggle INR": 1,
+}
+
+
+class Visitor:
+    # One simulated user: a session plus the choices it has made so far
+    def __init__(self, url, seed):
+        self.session = AppSession(url)
+        self.rng = random.Random(seed)
+        self.source = cities[0]
+        self.show_inr = False
+        self.timings = []
+
+    async def _timed(self, name, rerun):
+        timing = await rerun
+        self.timings.append((name, timing))
+
+    async def visit(self, steps):
+        await self.session.connect()
+        await self._timed("page load", self.session.rerun())
+        # First prediction up front, as most visitors submit before exploring
+        await self._submit()
+        actions = {
+            "change route": self._change_route,
+            "change airline": self._change_airline,
+            "change stops": self._change_stops,
+            "submit form": self._submit_form,
+            "toggle INR": self._toggle_inr,
+        }
+        names, weights = zip(*step_weights.items())
+        for name in self.rng.choices(names, weights, k=steps):
+            await actions[name]()
+
+    async def _change_route(self):
+        self.source = self.rng.choice(cities)
+        await self._timed("change route", self.session.set("source", self.source))
+        destination = self.rng.choice([city for city in cities if city != self.source])
+        await self._timed("change route", self.session.set("destination", destination))
+
+    async def _change_airline(self):
+        await self._timed("change airline", self.session.set("airline", self.rng.choice(airlines)))
+
+    async def _change_stops(self):
+        await self._timed("change stops", self.session.set("stops", self.rng.choice(stops_options[:3])))
+
+    async def _submit_form(self):
+        # Form fields only reach the server with the submit
+        self.session.stage("dep_time", self.rng.choice(departure_times))
+        self.session.stage("arr_time", self.rng.choice(arrival_times))
+        self.session.stage("days", self.rng.randint(1, 49))
+        await self._submit()
+
+    async def _submit(self):
+        await self._timed("submit form", self.session.click(SUBMIT_LABEL))
+
+    async def _toggle_inr(self):
+        self.show_inr = not self.show_inr
+        await self._timed("toggle INR", self.session.set(INR_LABEL, self.show_inr))
+
+    def close(self):
+        self.session.close()
+
+
+def _rss(process):
+    return process.memory_info().rss if process is not None else None
+
+
+def _distribution(seconds):
+    ms = np.asarray(seconds) * 1000
+    return {f"p{level}_ms": float(np.percentile(ms, level)) for level in (50, 90, 99)}
+
+
+async def run_wave(url, sessions, steps, process, seed=0, settle=2.0):
+    rss_before = _rss(process)
+    visitors = [Visitor(url, seed * 10_000 + i) for i in range(sessions)]
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(visitor.visit(steps) for visitor in visitors))
+        elapsed = time.perf_counter() - start
+        rss_loaded = _rss(process)
+    finally:
+        for visitor in visitors:
+            visitor.close()
+    # Give the server time to notice the disconnects and drop the sessions
+    await asyncio.sleep(settle)
+    rss_after = _rss(process)
+
+    timings = [timing for visitor in visitors for timing in visitor.timings]
+    wall = [t.wall for _, t in timings]
+    script = [t.script for _, t in timings if t.script is not None]
+    result = {
+        "sessions": sessions,
+        "reruns": len(timings),
+        "seconds": elapsed,
+        "reruns_per_sec": len(timings) / elapsed,
+        "wall": _distribution(wall),
+        "script": _distribution(script) if script else None,
+        "by_step": {
+            name: _distribution([t.wall for step, t in timings if step == name])
+            for name in dict.fromkeys(step for step, _ in timings)
+        },
+    }
+    if process is not None:
+        result.update(
+            rss_before_mb=rss_before / 1e6,
+            rss_loaded_mb=rss_loaded / 1e6,
+            rss_after_close_mb=rss_after / 1e6,
+            # Memory each live session holds, and what stayed behind once they were gone
+            rss_per_session_mb=(rss_loaded - rss_before) / sessions / 1e6,
+            rss_retained_mb=(rss_after - rss_before) / 1e6,
+        )
+    return result
+
+
+async def run_load_test(url, session_counts, steps, process, seed=0):
+    # Warm-up visit so the first wave doesn't pay for loading the model and dataset
+    await run_wave(url, 1, 1, None, seed=-1, settle=0)
+    return [await run_wave(url, sessions, steps, process, seed) for sessions in session_counts]
+
+
+def print_report(waves):
+    print(f"{'sessions':>8} {'reruns':>7} {'reruns/s':>9} {'wall p50':>9} {'p90':>8} {'p99':>8} "
+          f"{'script p50':>11} {'RSS MB':>8} {'MB/session':>11} {'retained MB':>12}")
+    for w in waves:
+        script = f"{w['script']['p50_ms']:>11.1f}" if w["script"] else f"{'-':>11}"
+        memory = (f"{w['rss_loaded_mb']:>8.1f} {w['rss_per_session_mb']:>11.2f} {w['rss_retained_mb']:>12.2f}"
+                  if "rss_loaded_mb" in w else "")
+        print(f"{w['sessions']:>8} {w['reruns']:>7} {w['reruns_per_sec']:>9.1f} {w['wall']['p50_ms']:>9.1f} "
+              f"{w['wall']['p90_ms']:>8.1f} {w['wall']['p99_ms']:>8.1f} {script} {memory}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive concurrent simulated sessions against the Streamlit app")
+    parser.add_argument("--app", default="app.py")
+    parser.add_argument("--url", help="Load-test an already running server instead of starting one")
+    parser.add_argument("--pid", type=int, help="Server process to watch for memory when using --url")
+    parser.add_argument("--sessions", type=int, nargs="+", default=DEFAULT_SESSIONS, help="Concurrent sessions per wave")
+    parser.add_argument("--steps", type=int, default=DEFAULT_STEPS, help="Interactions per session")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        url = args.url.rstrip("/")
+        process = psutil.Process(args.pid) if args.pid else None
+    else:
+        port = free_port()
+        url = f"http://127.0.0.1:{port}"
+        # Drop disconnected sessions straight away so retained memory shows leaks, not the reconnect grace period
+        server = start_server(args.app, port, "--server.disconnectedSessionTTL", "0")
+        process = psutil.Process(server.pid)
+    try:
+        wait_ready(url)
+        waves = asyncio.run(run_load_test(url, args.sessions, args.steps, process, args.seed))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print_report(waves)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(waves, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import psutil
+
+# Off unless FLIGHT_METRICS is set; timers and counters are then no-ops
+enabled = os.environ.get("FLIGHT_METRICS", "").lower() in ("1", "true", "yes", "on")
+
+# Optional standalone /metrics endpoint for processes without their own server (the Streamlit app)
+METRICS_PORT = int(os.environ.get("FLIGHT_METRICS_PORT", 0))
+
+PREFIX = "flight"
+
+# Seconds; from 50 µs (a cached single prediction) up to multi-second artifact loads
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # counts[i]: observations in (buckets[i-1], buckets[i]]; the last slot is +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_null_timer = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("registry", "labels", "start")
+
+    def __init__(self, registry, labels):
+        self.registry = registry
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(time.perf_counter() - self.start, self.labels)
+        if exc_type is not None:
+            self.registry.count("errors", labels=self.labels)
+        return False
+
+
+class Metrics:
+    """Stage timings (one histogram per label set), counters, and process RSS."""
+
+    def __init__(self, enabled=enabled, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def timer(self, stage, **labels):
+        if not self.enabled:
+            return _null_timer
+        return _Timer(self, tuple(sorted({"stage": stage, **labels}.items())))
+
+    def record(self, stage, seconds, **labels):
+        # For durations measured elsewhere
+        if self.enabled:
+            self.observe(seconds, tuple(sorted({"stage": stage, **labels}.items())))
+
+    def observe(self, seconds, labels):
+        with self._lock:
+            histogram = self.histograms.get(labels)
+            if histogram is None:
+                histogram = self.histograms[labels] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def count(self, name, value=1, labels=(), **extra):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted({**dict(labels), **extra}.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def snapshot(self):
+        with self._lock:
+            stages = [
+                {"stage": dict(labels)["stage"], **dict(labels), "count": h.count, "total_seconds": h.sum,
+                 "p50_seconds": h.quantile(0.5), "p90_seconds": h.quantile(0.9), "p99_seconds": h.quantile(0.99)}
+                for labels, h in self.histograms.items()
+            ]
+            counters = [{"name": name, **dict(labels), "value": value} for (name, labels), value in self.counters.items()]
+        return {"stages": stages, "counters": counters, "rss_bytes": rss_bytes()}
+
+    def prometheus_text(self):
+        lines = [
+            f"# HELP {PREFIX}_stage_seconds Time spent in each stage of a request or rerun.",
+            f"# TYPE {PREFIX}_stage_seconds histogram",
+        ]
+        with self._lock:
+            for labels, h in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, n in zip(list(self.buckets) + ["+Inf"], h.counts):
+                    cumulative += n
+                    lines.append(f"{PREFIX}_stage_seconds_bucket{_label_text(labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{PREFIX}_stage_seconds_sum{_label_text(labels)} {h.sum!r}")
+                lines.append(f"{PREFIX}_stage_seconds_count{_label_text(labels)} {h.count}")
+            names = sorted({name for name, _ in self.counters})
+            for name in names:
+                lines.append(f"# TYPE {PREFIX}_{name}_total counter")
+                for (counter, labels), value in sorted(self.counters.items()):
+                    if counter == name:
+                        lines.append(f"{PREFIX}_{name}_total{_label_text(labels)} {value}")
+        lines.append("# TYPE process_resident_memory_bytes gauge")
+        lines.append(f"process_resident_memory_bytes {rss_bytes()}")
+        return "\n".join(lines) + "\n"
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+
+_process = psutil.Process()
+
+
+def rss_bytes():
+    return _process.memory_info().rss
+
+
+registry = Metrics()
+timer = registry.timer
+record = registry.record
+count = registry.count
+snapshot = registry.snapshot
+prometheus_text = registry.prometheus_text
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_http_server(port=METRICS_PORT, host="127.0.0.1"):
+    # At most one exporter thread per process, however many times the app script reruns
+    global _server
+    if not registry.enabled or not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    return _server
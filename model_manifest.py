@@ -0,0 +1,45 @@
+import json
+import os
+from pathlib import Path
+
+from features import model_columns
+
+
+def manifest_path(model_path):
+    # model_DecisionTree.pkl -> model_DecisionTree.columns.json
+    return Path(model_path).with_suffix(".columns.json")
+
+
+def write_manifest(model_path, columns=model_columns, **info):
+    path = manifest_path(model_path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"columns": list(columns), **info}, f, indent=1)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_manifest(model_path):
+    # None for model files saved before manifests existed
+    path = manifest_path(model_path)
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def validate(model, manifest, columns=model_columns):
+    # The serving code encodes features in `columns` order; a model trained on
+    # anything else would silently read the wrong inputs
+    if manifest is None:
+        return
+    if manifest["columns"] != list(columns):
+        missing = sorted(set(columns) - set(manifest["columns"]))
+        extra = sorted(set(manifest["columns"]) - set(columns))
+        raise ValueError(f"Model manifest columns differ from features.model_columns (missing {missing}, extra {extra})")
+    names = getattr(model, "feature_names_in_", None)
+    if names is not None and list(names) != manifest["columns"]:
+        raise ValueError("Model feature_names_in_ do not match its manifest")
+    n_features = getattr(model, "n_features_in_", None)
+    if n_features is not None and n_features != len(manifest["columns"]):
+        raise ValueError(f"Model expects {n_features} features, manifest lists {len(manifest['columns'])}")
@@ -0,0 +1,254 @@
+import argparse
+import glob
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from features import FeatureEncoder, normalize_queries
+from model_manifest import read_manifest
+from resources import MODEL_PATH, artifact_version, load_historical_df, load_model_version, load_scoring_model
+
+PRIMARY_VERSION = "DecisionTree"
+DEFAULT_SHADOW_WORKERS = 2
+# Shadow batches waiting beyond this are dropped rather than queued
+DEFAULT_MAX_PENDING = 32
+
+
+def discover(directory="."):
+    # model_<version>.pkl files next to model_DecisionTree.pkl, keyed by version
+    paths = sorted(glob.glob(os.path.join(directory, "model_*.pkl")))
+    return {os.path.basename(path)[len("model_"):-len(".pkl")]: path for path in paths}
+
+
+class ModelStats:
+    def __init__(self, version, memory_bytes, has_manifest):
+        self.version = version
+        self.memory_bytes = memory_bytes
+        self.has_manifest = has_manifest
+        self.latency = metrics.Histogram()
+        self.rows = 0
+        # Differences from the primary model's prices, over every shadow-scored row
+        self.delta_rows = 0
+        self.abs_delta_sum = 0.0
+        self.sq_delta_sum = 0.0
+        self.max_abs_delta = 0.0
+        # Shadow scoring failures, which never reach the caller
+        self.errors = 0
+        self.last_error = None
+
+    def add_deltas(self, prices, primary_prices):
+        delta = np.abs(prices - primary_prices)
+        self.delta_rows += len(delta)
+        self.abs_delta_sum += float(delta.sum())
+        self.sq_delta_sum += float((delta ** 2).sum())
+        self.max_abs_delta = max(self.max_abs_delta, float(delta.max(initial=0.0)))
+
+    def to_dict(self):
+        calls = self.latency.count
+        return {
+            "memory_bytes": self.memory_bytes,
+            "manifest": self.has_manifest,
+            "calls": calls,
+            "rows": self.rows,
+            "mean_ms": self.latency.sum / calls * 1000 if calls else None,
+            "p50_ms": _ms(self.latency.quantile(0.5)),
+            "p99_ms": _ms(self.latency.quantile(0.99)),
+            "delta_rows": self.delta_rows,
+            "mean_abs_delta": self.abs_delta_sum / self.delta_rows if self.delta_rows else None,
+            "rmse_delta": (self.sq_delta_sum / self.delta_rows) ** 0.5 if self.delta_rows else None,
+            "max_abs_delta": self.max_abs_delta if self.delta_rows else None,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+def _ms(seconds):
+    return None if seconds is None else seconds * 1000
+
+
+class ModelRegistry:
+    """Named model versions: one primary that answers, others shadow-scored in the background.
+
+    Usable wherever a model is: ``predict(X)`` returns the primary's prices
+    and hands the same rows to the shadow models on a thread pool, so the
+    caller never waits for them. Artifacts are loaded through resources and
+    reload when their files change.
+    """
+
+    def __init__(self, versions, primary=PRIMARY_VERSION, shadow=(), encoder=None,
+                 max_workers=DEFAULT_SHADOW_WORKERS, max_pending=DEFAULT_MAX_PENDING):
+        if primary not in versions:
+            raise KeyError(f"Unknown primary model version {primary!r}; have {sorted(versions)}")
+        unknown = [name for name in shadow if name not in versions]
+        if unknown:
+            raise KeyError(f"Unknown shadow model versions {unknown}; have {sorted(versions)}")
+        self.paths = dict(versions)
+        self.primary = primary
+        self.shadow = [name for name in shadow if name != primary]
+        self.encoder = encoder or FeatureEncoder()
+        self.max_pending = max_pending
+        self.shadow_dropped = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="shadow") if self.shadow else None
+        for name in [primary, *self.shadow]:
+            self._load(name)
+
+    @classmethod
+    def from_directory(cls, directory=".", primary=PRIMARY_VERSION, shadow="all", **kwargs):
+        versions = discover(directory)
+        if shadow == "all":
+            shadow = list(versions)
+        return cls(versions, primary=primary, shadow=shadow or (), **kwargs)
+
+    def _load(self, name):
+        model = load_model_version(name, self.paths[name])
+        scorer = load_scoring_model(name, self.paths[name])
+        version = artifact_version(f"model:{name}")
+        stats = self._stats.get(name)
+        if stats is None or stats.version != version:
+            # A new artifact starts fresh stats; footprint is the pickled size of the fitted model
+            stats = ModelStats(version, len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)),
+                               read_manifest(self.paths[name]) is not None)
+            with self._lock:
+                self._stats[name] = stats
+        return scorer
+
+    def model_version(self, name=None):
+        # Checks the file first, so a replaced model shows up as a new version
+        # before its first prediction, not after
+        name = name or self.primary
+        self._load(name)
+        return artifact_version(f"model:{name}")
+
+    @property
+    def primary_model(self):
+        # The primary alone, for callers that shadow-score separately
+        return _PrimaryModel(self)
+
+    def score(self, name, X):
+        scorer = self._load(name)
+        start = time.perf_counter()
+        prices = np.asarray(self.encoder.predict(scorer, X), dtype=np.float64)
+        elapsed = time.perf_counter() - start
+        metrics.record("model_predict", elapsed, model=name)
+        with self._lock:
+            stats = self._stats[name]
+            stats.latency.observe(elapsed)
+            stats.rows += len(X)
+        return prices
+
+    def predict(self, X):
+        prices = self.score(self.primary, X)
+        self.shadow_score(X, prices)
+        return prices
+
+    def shadow_score(self, X, primary_prices):
+        # Queues X for every shadow model, to compare against the primary's prices
+        if not self.shadow:
+            return
+        X, primary_prices = np.array(X, copy=True), np.array(primary_prices, dtype=np.float64, copy=True)
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.shadow_dropped += 1
+                metrics.count("shadow_dropped")
+                return
+            self._pending += 1
+        self._executor.submit(self._shadow_score, X, primary_prices)
+
+    def _shadow_score(self, X, primary_prices):
+        try:
+            for name in self.shadow:
+                # One failing model must not keep the others from being scored
+                try:
+                    prices = self.score(name, X)
+                    with self._lock:
+                        self._stats[name].add_deltas(prices, primary_prices)
+                except Exception as exc:
+                    metrics.count("errors", stage="shadow", model=name)
+                    with self._lock:
+                        stats = self._stats[name]
+                        stats.errors += 1
+                        stats.last_error = f"{type(exc).__name__}: {exc}"
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def wait(self):
+        # Blocks until every submitted shadow batch has been scored
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+            time.sleep(0.001)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "primary": self.primary,
+                "shadow": list(self.shadow),
+                "shadow_pending": self._pending,
+                "shadow_dropped": self.shadow_dropped,
+                "models": {name: stats.to_dict() for name, stats in self._stats.items()},
+            }
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+
+class _PrimaryModel:
+    def __init__(self, registry):
+        self.registry = registry
+
+    def predict(self, X):
+        return self.registry.score(self.registry.primary, X)
+
+
+def compare(registry, historical_df, rows=5000, batch_size=1, seed=0):
+    # Replays sampled dataset rows through the registry, then adds each model's
+    # error against the recorded prices
+    sample = historical_df.sample(min(rows, len(historical_df)), random_state=seed)
+    X = registry.encoder.encode_batch(normalize_queries(sample))
+    actual = sample['price'].to_numpy(dtype=np.float64)
+    for start in range(0, len(X), batch_size):
+        registry.predict(X[start:start + batch_size])
+    registry.wait()
+    report = registry.stats()
+    for name in report["models"]:
+        report["models"][name]["mae"] = float(np.mean(np.abs(registry.score(name, X) - actual)))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score sampled rows with every model version side by side")
+    parser.add_argument("--dir", default=os.path.dirname(MODEL_PATH) or ".")
+    parser.add_argument("--primary", default=PRIMARY_VERSION)
+    parser.add_argument("--shadow", nargs="*", help="Versions to shadow-score (default: all discovered)")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=1)
+    args = parser.parse_args()
+
+    registry = ModelRegistry.from_directory(args.dir, args.primary, "all" if args.shadow is None else args.shadow,
+                                            max_pending=1 << 30)
+    try:
+        report = compare(registry, load_historical_df(), args.rows, args.batch_size)
+    finally:
+        registry.close()
+
+    table = pd.DataFrame(report["models"]).T
+    table["memory_mb"] = table["memory_bytes"] / 1e6
+    columns = ["manifest", "calls", "p50_ms", "p99_ms", "mean_ms", "memory_mb", "mae", "mean_abs_delta", "max_abs_delta"]
+    print(f"primary: {report['primary']}, rows: {args.rows:,}, batch size: {args.batch_size}")
+    print(table[columns].to_string(float_format=lambda v: f"{v:,.3f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from features import airlines, arrival_times, business_airlines, classes, departure_times
+from route_index import stop_label
+
+# Stop counts the historical data distinguishes ('two_or_more' scored as 2)
+stop_options = [0, 1, 2]
+
+
+def _build_option_grid():
+    grid = pd.MultiIndex.from_product(
+        [airlines, departure_times, arrival_times, stop_options, classes],
+        names=['airline', 'departure_time', 'arrival_time', 'stops', 'class']
+    ).to_frame(index=False)
+    valid = (grid['class'] == 'Economy') | grid['airline'].isin(business_airlines)
+    return grid[valid].reset_index(drop=True)
+
+
+# Airline x time x stops x class combinations do not depend on the route
+option_grid = _build_option_grid()
+
+
+def itinerary_grid(route_index, source, destination, days_left):
+    # Durations come from the historical route medians; stop counts never
+    # flown on this route are left out
+    durations = {}
+    for stops in stop_options:
+        entry = route_index.get((source, destination, stop_label(stops)))
+        if entry is not None:
+            durations[stops] = int(entry['median'])
+
+    grid = option_grid[option_grid['stops'].isin(list(durations))].copy()
+    grid['source_city'] = source
+    grid['destination_city'] = destination
+    grid['duration_mins'] = grid['stops'].map(durations)
+    grid['days_left'] = days_left
+    return grid.reset_index(drop=True)
+
+
+def rank_itineraries(model, encoder, route_index, source, destination, days_left, top_k=10):
+    grid = itinerary_grid(route_index, source, destination, days_left)
+    if grid.empty:
+        return grid.assign(price=pd.Series(dtype=float))
+    # The whole grid is encoded and scored in one batch
+    grid['price'] = encoder.predict(model, encoder.encode_batch(grid))
+    order = np.argsort(grid['price'].to_numpy(), kind='stable')[:top_k]
+    return grid.iloc[order].reset_index(drop=True)
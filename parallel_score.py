@@ -0,0 +1,165 @@
+import argparse
+import io
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from batch_score import (
+    DEFAULT_CHUNKSIZE, PRICE_COLUMN, ChunkWriter, is_parquet, score_file, score_frame, write_scored
+)
+from features import FeatureEncoder
+from resources import MODEL_PATH, load_model
+from tree_engine import FlatTree
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+# Shards per worker, so a slow shard doesn't leave the other workers idle at the end
+SHARDS_PER_WORKER = 4
+
+# Per-worker state, set once by _init_worker
+_worker_tree = None
+_worker_encoder = None
+
+
+def _init_worker(tree_dir, columns):
+    global _worker_tree, _worker_encoder
+    _worker_tree = FlatTree.load(tree_dir, mmap=True)
+    _worker_encoder = FeatureEncoder(columns)
+
+
+def csv_shards(path, shards):
+    # Byte ranges of about equal size, each starting at the beginning of a
+    # line; quoted fields must not contain line breaks
+    with open(path, "rb") as f:
+        f.readline()
+        data_start = f.tell()
+        size = os.fstat(f.fileno()).st_size
+        bounds = [data_start]
+        for i in range(1, shards):
+            f.seek(max(data_start + (size - data_start) * i // shards, bounds[-1]))
+            f.readline()
+            bounds.append(min(f.tell(), size))
+        bounds.append(size)
+    return [("csv", start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def parquet_shards(path):
+    # Row groups are the unit a reader can start at, so they are the shards
+    return [("parquet", i) for i in range(pq.ParquetFile(path).num_row_groups)]
+
+
+def _read_shard(path, shard, chunksize):
+    if shard[0] == "parquet":
+        table = pq.ParquetFile(path).read_row_group(shard[1])
+        for batch in table.to_batches(max_chunksize=chunksize):
+            yield batch.to_pandas()
+        return
+    _, start, end = shard
+    with open(path, "rb") as f:
+        header = f.readline()
+        f.seek(start)
+        data = f.read(end - start)
+    yield from pd.read_csv(io.BytesIO(header + data), chunksize=chunksize)
+
+
+def _score_shard(input_path, shard, part_path, chunksize):
+    # Reads, scores and writes one shard entirely inside the worker; the
+    # parent only joins the part files in order
+    scored = ((chunk, score_frame(_worker_tree, _worker_encoder, chunk)) for chunk in _read_shard(input_path, shard, chunksize))
+    stats = write_scored(scored, part_path)
+    return part_path if stats["rows"] else None, stats
+
+
+def score_file_parallel(input_path, output_path, model=None, workers=DEFAULT_WORKERS,
+                        chunksize=DEFAULT_CHUNKSIZE, encoder=None):
+    model = model if model is not None else load_model()
+    encoder = encoder or FeatureEncoder()
+    if workers <= 1:
+        stats = score_file(input_path, output_path, model=model, chunksize=chunksize, encoder=encoder)
+        stats["workers"] = workers
+        return stats
+
+    start = time.perf_counter()
+    if is_parquet(input_path):
+        shards = parquet_shards(input_path)
+    else:
+        shards = csv_shards(input_path, workers * SHARDS_PER_WORKER)
+    part_ext = os.path.splitext(output_path)[1]
+    stats = {"rows": 0, "unscored_rows": 0}
+    with tempfile.TemporaryDirectory(prefix="flight_parts_", dir=os.path.dirname(os.path.abspath(output_path))) as work_dir:
+        # Workers memory-map the tree's node arrays instead of unpickling the model
+        tree_dir = os.path.join(work_dir, "tree")
+        FlatTree.from_model(model).save(tree_dir)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(tree_dir, encoder.columns)) as executor:
+            futures = [
+                executor.submit(_score_shard, input_path, shard, os.path.join(work_dir, f"part-{i:05d}{part_ext}"), chunksize)
+                for i, shard in enumerate(shards)
+            ]
+            writer = ChunkWriter(output_path)
+            completed = False
+            try:
+                for future in futures:
+                    part_path, part_stats = future.result()
+                    stats["rows"] += part_stats["rows"]
+                    stats["unscored_rows"] += part_stats["unscored_rows"]
+                    if part_path is not None:
+                        writer.append_part(part_path)
+                        os.remove(part_path)
+                completed = True
+            finally:
+                writer.close(completed)
+    elapsed = time.perf_counter() - start
+    stats.update(seconds=elapsed, rows_per_sec=stats["rows"] / elapsed if elapsed > 0 else 0.0,
+                 workers=workers, shards=len(shards))
+    return stats
+
+
+def benchmark(input_path, worker_counts, model=None, chunksize=DEFAULT_CHUNKSIZE):
+    model = model if model is not None else load_model()
+    results = []
+    with tempfile.TemporaryDirectory(prefix="flight_bench_") as out_dir:
+        output_path = os.path.join(out_dir, "scored.parquet")
+        for workers in worker_counts:
+            start = time.perf_counter()
+            stats = score_file_parallel(input_path, output_path, model=model, workers=workers, chunksize=chunksize)
+            stats["wall_seconds"] = time.perf_counter() - start
+            results.append(stats)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet file of flight queries across processes")
+    parser.add_argument("input", help="CSV or Parquet file of flight queries")
+    parser.add_argument("output", nargs="?", help="CSV or Parquet file to write, chosen by extension")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--benchmark", type=int, nargs="+", metavar="WORKERS",
+                        help="Time the input at each worker count instead of writing output")
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    if args.benchmark:
+        results = benchmark(args.input, args.benchmark, model=model, chunksize=args.chunksize)
+        baseline = results[0]["wall_seconds"]
+        print(f"{'workers':>8} {'seconds':>9} {'rows/sec':>12} {'speedup':>8}")
+        for stats in results:
+            print(f"{stats['workers']:>8} {stats['wall_seconds']:>9.2f} "
+                  f"{stats['rows'] / stats['wall_seconds']:>12,.0f} {baseline / stats['wall_seconds']:>7.2f}x")
+        return
+
+    if args.output is None:
+        parser.error("output is required unless --benchmark is given")
+    stats = score_file_parallel(args.input, args.output, model=model, workers=args.workers, chunksize=args.chunksize)
+    print(f"Scored {stats['rows']:,} rows with {stats['workers']} workers in {stats['seconds']:.2f}s "
+          f"({stats['rows_per_sec']:,.0f} rows/sec)")
+    if stats["unscored_rows"]:
+        print(f"{stats['unscored_rows']:,} rows could not be priced and have no {PRICE_COLUMN}")
+
+
+if __name__ == "__main__":
+    main()
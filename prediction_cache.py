@@ -0,0 +1,133 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import metrics
+
+DEFAULT_MAXSIZE = 10_000
+DEFAULT_TTL = 3600.0
+# Whole results (booking curves, itinerary rankings) are fewer and larger
+DEFAULT_RESULT_MAXSIZE = 1_000
+
+
+def row_keys(X):
+    # Compact key per encoded row: 16-byte digest of its float64 bytes
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    return [hashlib.blake2b(row.tobytes(), digest_size=16).digest() for row in X]
+
+
+class PredictionCache:
+    """Thread-safe LRU cache of predictions with a TTL, tied to one model version."""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _check_version(self, model_version):
+        # A different model file invalidates everything cached so far
+        if model_version != self._model_version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._model_version = model_version
+
+    def get_many(self, keys, model_version):
+        now = self._clock()
+        values = []
+        with self._lock:
+            self._check_version(model_version)
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] <= now:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    self.misses += 1
+                    values.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    values.append(entry[1])
+        return values
+
+    def put_many(self, keys, values, model_version):
+        expires_at = self._clock() + self.ttl
+        with self._lock:
+            self._check_version(model_version)
+            for key, value in zip(keys, values):
+                self._entries[key] = (expires_at, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, model_version, compute):
+        # For whole results keyed by their inputs; compute() runs outside the lock
+        value = self.get_many([key], model_version)[0]
+        if value is None:
+            value = compute()
+            self.put_many([key], [value], model_version)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+class CachedPredictor:
+    # Drop-in for the model wherever encoder.predict(model, X) is used: only
+    # rows missing from the cache reach the real model, in one predict call.
+    # model_version may be a callable, asked on every call, for models that
+    # reload themselves when their file changes.
+    def __init__(self, model, encoder, cache, model_version):
+        self.model = model
+        self.encoder = encoder
+        self.cache = cache
+        self.model_version = model_version
+
+    def predict(self, X):
+        X = np.asarray(X)
+        with metrics.timer("predict"):
+            model_version = self.model_version() if callable(self.model_version) else self.model_version
+            keys = row_keys(X)
+            values = self.cache.get_many(keys, model_version)
+            missing = [i for i, value in enumerate(values) if value is None]
+            if missing:
+                predicted = self.encoder.predict(self.model, X[missing])
+                self.cache.put_many([keys[i] for i in missing], predicted.tolist(), model_version)
+                for i, value in zip(missing, predicted):
+                    values[i] = value
+        # Rows, not requests: a submit scores its counterfactuals in the same call.
+        # Requests are counted as "predictions" by the app and the service.
+        metrics.count("scored_rows", len(X))
+        metrics.count("model_rows", len(missing))
+        return np.asarray(values, dtype=np.float64)
@@ -0,0 +1,287 @@
+import hashlib
+import os
+import threading
+import time
+
+import joblib
+import pandas as pd
+
+import dataset_store
+import metrics
+import model_manifest
+import route_index
+from dataset_store import DATASET_PATH
+from fare_sketch import FareSketches
+from features import FeatureEncoder, cities, model_columns, normalize_queries, stops_options
+from leaf_intervals import LeafIntervals
+from prediction_cache import DEFAULT_MAXSIZE, DEFAULT_RESULT_MAXSIZE, DEFAULT_TTL, PredictionCache
+from similar_flights import SimilarFlightsIndex
+from tree_engine import FlatTree
+
+MODEL_PATH = "model_DecisionTree.pkl"
+
+# Artifacts live at module level so every Streamlit session in the process
+# shares one copy; Streamlit re-executes app.py on each rerun but keeps
+# imported modules in sys.modules.
+_lock = threading.Lock()
+_artifacts = {}
+_load_stats = {}
+# Path, size and sha256 of the dataset file the similar-flights index holds
+_similar_flights_source = {}
+
+# One prediction cache per process, sized through the environment
+_prediction_cache = PredictionCache(
+    maxsize=int(os.environ.get("FLIGHT_CACHE_SIZE", DEFAULT_MAXSIZE)),
+    ttl=float(os.environ.get("FLIGHT_CACHE_TTL", DEFAULT_TTL)),
+)
+# Multi-row results are cached whole in their own LRU, so a submit adds one
+# entry per result instead of pushing single predictions out of the one above
+_result_cache = PredictionCache(
+    maxsize=int(os.environ.get("FLIGHT_RESULT_CACHE_SIZE", DEFAULT_RESULT_MAXSIZE)),
+    ttl=float(os.environ.get("FLIGHT_CACHE_TTL", DEFAULT_TTL)),
+)
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _file_sha256(path, size=None):
+    # sha256 of the whole file, or of just its first size bytes
+    digest = hashlib.sha256()
+    remaining = os.stat(path).st_size if size is None else size
+    with open(path, "rb") as f:
+        while remaining > 0:
+            block = f.read(min(1 << 20, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest()
+
+
+def _is_appended(path, old_size, old_sha256):
+    # The file grew only by appending lines: its first old_size bytes are the
+    # old file and that ended a line, so no old row was extended
+    if os.stat(path).st_size <= old_size:
+        return False
+    with open(path, "rb") as f:
+        f.seek(old_size - 1)
+        if f.read(1) != b"\n":
+            return False
+    return _file_sha256(path, old_size) == old_sha256
+
+
+def _get_artifact(name, path, loader):
+    signature = _file_signature(path)
+    entry = _artifacts.get(name)
+    if entry is not None and entry["signature"] == signature:
+        _load_stats[name]["hits"] += 1
+        return entry["value"]
+
+    with _lock:
+        entry = _artifacts.get(name)
+        if entry is not None and entry["signature"] == signature:
+            _load_stats[name]["hits"] += 1
+            return entry["value"]
+
+        # mtime/size changed: only reload when the content really differs
+        sha256 = _file_sha256(path)
+        if entry is not None and entry["sha256"] == sha256:
+            entry["signature"] = signature
+            _load_stats[name]["hits"] += 1
+            return entry["value"]
+
+        start = time.perf_counter()
+        value = loader(path)
+        elapsed = time.perf_counter() - start
+        metrics.record("artifact_load", elapsed, artifact=name)
+
+        _artifacts[name] = {"value": value, "signature": signature, "sha256": sha256, "path": os.path.abspath(path)}
+        stats = _load_stats.setdefault(name, {"loads": 0, "hits": 0, "total_load_seconds": 0.0})
+        stats.update(
+            path=os.path.abspath(path),
+            sha256=sha256,
+            size_bytes=signature[1],
+            last_load_seconds=elapsed,
+            loaded_at=time.time(),
+        )
+        stats["loads"] += 1
+        stats["total_load_seconds"] += elapsed
+        return value
+
+
+def _read_model(path):
+    model = joblib.load(path)
+    # Models written by train.py come with a column manifest; refuse one that
+    # doesn't match the columns FeatureEncoder produces
+    model_manifest.validate(model, model_manifest.read_manifest(path))
+    return model
+
+
+def _read_historical_df(path):
+    df = pd.read_csv(path)
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def load_model(path=MODEL_PATH):
+    return _get_artifact("model", path, _read_model)
+
+
+def _store_is_current(path, store_path):
+    if not os.path.exists(store_path):
+        return False
+    return not os.path.exists(path) or os.stat(store_path).st_mtime_ns >= os.stat(path).st_mtime_ns
+
+
+def load_historical_df(path=DATASET_PATH, store_path=None):
+    # Shared between sessions: callers must treat the frame as read-only.
+    # The memory-mapped Arrow copy converted from this CSV (same name, .arrow)
+    # is used when it is at least as new as the CSV.
+    if store_path is None:
+        store_path = dataset_store.store_path_for(path)
+    if _store_is_current(path, store_path):
+        return _get_artifact("historical_df", store_path, dataset_store.read_historical)
+    return _get_artifact("historical_df", path, _read_historical_df)
+
+
+def _get_derived(name, source_name, builder):
+    # Derived artifacts are rebuilt whenever the artifact(s) they come from change
+    if isinstance(source_name, tuple):
+        version = tuple(artifact_version(source) for source in source_name)
+    else:
+        version = artifact_version(source_name)
+    entry = _artifacts.get(name)
+    if entry is not None and entry["source_version"] == version:
+        _load_stats[name]["hits"] += 1
+        return entry["value"]
+
+    with _lock:
+        entry = _artifacts.get(name)
+        if entry is not None and entry["source_version"] == version:
+            _load_stats[name]["hits"] += 1
+            return entry["value"]
+
+        start = time.perf_counter()
+        value = builder()
+        elapsed = time.perf_counter() - start
+        metrics.record("artifact_load", elapsed, artifact=name)
+
+        _artifacts[name] = {"value": value, "source_version": version, "sha256": version}
+        stats = _load_stats.setdefault(name, {"loads": 0, "hits": 0, "total_load_seconds": 0.0})
+        stats.update(source=source_name, last_load_seconds=elapsed, loaded_at=time.time())
+        stats["loads"] += 1
+        stats["total_load_seconds"] += elapsed
+        return value
+
+
+def _build_route_index(historical_df, index_path):
+    dataset_sha256 = artifact_version("historical_df")
+    index = route_index.load_route_index(index_path, dataset_sha256=dataset_sha256)
+    if index is None:
+        index = route_index.build_route_index(historical_df)
+    return index
+
+
+def load_route_index(path=DATASET_PATH, index_path=route_index.ROUTE_INDEX_PATH):
+    historical_df = load_historical_df(path)
+    return _get_derived("route_index", "historical_df", lambda: _build_route_index(historical_df, index_path))
+
+
+def _build_duration_suggestions(index):
+    return {
+        (source, destination, stops): route_index.suggest_duration(index, source, destination, stops)
+        for source in cities for destination in cities if destination != source for stops in stops_options
+    }
+
+
+def load_duration_suggestions(path=DATASET_PATH):
+    # Suggested duration for every (source, destination, stops) the form offers
+    index = load_route_index(path)
+    return _get_derived("duration_suggestions", "historical_df", lambda: _build_duration_suggestions(index))
+
+
+def load_fare_sketches(path=DATASET_PATH):
+    historical_df = load_historical_df(path)
+    return _get_derived("fare_sketches", "historical_df", lambda: FareSketches.build(historical_df))
+
+
+def _update_similar_flights(historical_df):
+    # When the dataset file only had rows appended since the index was built,
+    # just its new tail is fed to the existing index instead of rebuilding
+    # every group; any other change (or a rewritten Arrow store) rebuilds
+    entry = _artifacts.get("similar_flights")
+    source = _artifacts["historical_df"]
+    indexed = dict(_similar_flights_source)
+    if (entry is not None and indexed.get("path") == source["path"]
+            and len(historical_df) > entry["value"].rows
+            and _is_appended(source["path"], indexed["size"], indexed["sha256"])):
+        index = entry["value"]
+        index.append(historical_df.iloc[index.rows:])
+    else:
+        index = SimilarFlightsIndex.build(historical_df)
+    _similar_flights_source.update(path=source["path"], size=source["signature"][1], sha256=source["sha256"])
+    return index
+
+
+def load_similar_flights(path=DATASET_PATH):
+    historical_df = load_historical_df(path)
+    return _get_derived("similar_flights", "historical_df", lambda: _update_similar_flights(historical_df))
+
+
+def _build_tree_engine(model):
+    # The engine takes bare arrays, so the model must expect model_columns order
+    names = getattr(model, "feature_names_in_", None)
+    if names is not None and list(names) != model_columns:
+        raise ValueError("Model was fitted on columns that do not match features.model_columns")
+    return FlatTree.from_model(model)
+
+
+def load_tree_engine(path=MODEL_PATH):
+    model = load_model(path)
+    return _get_derived("tree_engine", "model", lambda: _build_tree_engine(model))
+
+
+def load_model_version(name, path):
+    # Extra model artifacts (see model_registry), cached and reloaded like the primary model
+    return _get_artifact(f"model:{name}", path, _read_model)
+
+
+def load_scoring_model(name, path):
+    # Trees are scored through their flat-array engine; other models as they are
+    model = load_model_version(name, path)
+    if getattr(model, "tree_", None) is None:
+        return model
+    return _get_derived(f"tree_engine:{name}", f"model:{name}", lambda: _build_tree_engine(model))
+
+
+def _build_leaf_intervals(engine, historical_df):
+    # The historical dataset is the data the model was trained on
+    X = FeatureEncoder().encode_batch(normalize_queries(historical_df))
+    return LeafIntervals.build(engine, X, historical_df['price'])
+
+
+def load_leaf_intervals(path=MODEL_PATH, dataset_path=DATASET_PATH):
+    engine = load_tree_engine(path)
+    historical_df = load_historical_df(dataset_path)
+    return _get_derived("leaf_intervals", ("model", "historical_df"), lambda: _build_leaf_intervals(engine, historical_df))
+
+
+def artifact_version(name):
+    entry = _artifacts.get(name)
+    return entry["sha256"] if entry is not None else None
+
+
+def get_load_stats():
+    with _lock:
+        return {name: dict(stats) for name, stats in _load_stats.items()}
+
+
+def get_prediction_cache():
+    return _prediction_cache
+
+
+def get_result_cache():
+    return _result_cache
@@ -0,0 +1,76 @@
+import argparse
+import json
+import os
+
+ROUTE_INDEX_PATH = "route_index.json"
+DEFAULT_DURATION_MINS = 130
+
+stop_map = {0: 'zero', 1: 'one', 2: 'two_or_more', 3: 'two_or_more', 4: 'two_or_more', 5: 'two_or_more'}
+
+# Quantiles kept per route, stored in minutes
+quantiles = {'p10': 0.10, 'p25': 0.25, 'median': 0.50, 'p75': 0.75, 'p90': 0.90}
+
+
+def stop_label(stops):
+    return stop_map.get(stops, 'two_or_more')
+
+
+def build_route_index(historical_df):
+    grouped = historical_df.groupby(['source_city', 'destination_city', 'stops'], observed=True)['duration']
+    stats = grouped.quantile(list(quantiles.values())).unstack()
+    stats.columns = list(quantiles.keys())
+    stats = stats.join(grouped.agg(['min', 'max', 'count']))
+
+    index = {}
+    for (source, destination, stops), row in stats.iterrows():
+        entry = {name: float(row[name]) * 60 for name in [*quantiles, 'min', 'max']}
+        entry['count'] = int(row['count'])
+        index[(source, destination, stops)] = entry
+    return index
+
+
+def suggest_duration(index, source, destination, stops, default=DEFAULT_DURATION_MINS):
+    entry = index.get((source, destination, stop_label(stops)))
+    return int(entry['median']) if entry is not None else default
+
+
+def save_route_index(index, path=ROUTE_INDEX_PATH, dataset_sha256=None):
+    routes = [
+        {'source_city': source, 'destination_city': destination, 'stops': stops, **entry}
+        for (source, destination, stops), entry in index.items()
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({'dataset_sha256': dataset_sha256, 'routes': routes}, f, indent=1)
+
+
+def load_route_index(path=ROUTE_INDEX_PATH, dataset_sha256=None):
+    # Returns None when the file is missing or was built from another dataset
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        payload = json.load(f)
+    if dataset_sha256 is not None and payload.get('dataset_sha256') != dataset_sha256:
+        return None
+
+    index = {}
+    for route in payload['routes']:
+        key = (route.pop('source_city'), route.pop('destination_city'), route.pop('stops'))
+        index[key] = route
+    return index
+
+
+def main():
+    from resources import DATASET_PATH, artifact_version, load_historical_df
+
+    parser = argparse.ArgumentParser(description="Rebuild the route duration index offline")
+    parser.add_argument("--dataset", default=DATASET_PATH)
+    parser.add_argument("--output", default=ROUTE_INDEX_PATH)
+    args = parser.parse_args()
+
+    index = build_route_index(load_historical_df(args.dataset))
+    save_route_index(index, args.output, dataset_sha256=artifact_version("historical_df"))
+    print(f"Wrote {len(index)} routes to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
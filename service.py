@@ -0,0 +1,227 @@
+import argparse
+import asyncio
+import json
+
+import numpy as np
+import pandas as pd
+import tornado.web
+
+import metrics
+from features import FeatureEncoder, invalid_queries, normalize_queries, normalize_query, query_fields, valid_queries
+from model_registry import PRIMARY_VERSION, ModelRegistry
+from prediction_cache import CachedPredictor
+from resources import artifact_version, get_load_stats, get_prediction_cache, load_tree_engine
+
+DEFAULT_PORT = 8600
+DEFAULT_MAX_BATCH = 64
+DEFAULT_MAX_WAIT = 0.002
+
+
+class MicroBatcher:
+    """Collects concurrent single predictions and scores them in one predict call.
+
+    A batch is flushed when it reaches ``max_batch`` rows or ``max_wait``
+    seconds after its first row arrived, whichever comes first.
+    """
+
+    def __init__(self, predict, max_batch=DEFAULT_MAX_BATCH, max_wait=DEFAULT_MAX_WAIT):
+        self.predict = predict
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._rows = []
+        self._futures = []
+        self._timer = None
+        self.batches = 0
+        self.rows = 0
+
+    async def submit(self, row):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._rows.append(row)
+        self._futures.append(future)
+        if len(self._rows) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        rows, futures = self._rows, self._futures
+        self._rows, self._futures = [], []
+        if not rows:
+            return
+        # Scored inline on the event loop: a batch of 64 rows is a few milliseconds
+        try:
+            prices = self.predict(np.vstack(rows))
+        except Exception as exc:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        self.batches += 1
+        self.rows += len(rows)
+        for future, price in zip(futures, prices):
+            if not future.done():
+                future.set_result(float(price))
+
+
+class BaseHandler(tornado.web.RequestHandler):
+    def initialize(self, service):
+        self.service = service
+
+    def write_error(self, status_code, **kwargs):
+        metrics.count("errors", stage="request", path=self.request.path, status=status_code)
+        reason = self._reason
+        if "exc_info" in kwargs and isinstance(kwargs["exc_info"][1], tornado.web.HTTPError):
+            reason = kwargs["exc_info"][1].log_message or reason
+        self.finish({"error": reason})
+
+    def json_body(self):
+        try:
+            return json.loads(self.request.body)
+        except ValueError:
+            raise tornado.web.HTTPError(400, "Request body must be JSON")
+
+
+class PredictHandler(BaseHandler):
+    async def post(self):
+        query = self.json_body()
+        if not isinstance(query, dict):
+            raise tornado.web.HTTPError(400, "Expected a JSON object")
+        missing = [field for field in query_fields if field not in query]
+        if missing:
+            raise tornado.web.HTTPError(400, f"Missing fields: {missing}")
+        try:
+            with metrics.timer("encode", endpoint="predict"):
+                query = normalize_query(query)
+                # The same checks as the form and /predict/bulk, on one-row arrays
+                problems = invalid_queries({field: [query[field]] for field in query_fields})
+                if not problems:
+                    row = self.service.encoder.encode(query)[0]
+        except (ValueError, KeyError, TypeError) as exc:
+            raise tornado.web.HTTPError(400, str(exc))
+        if problems:
+            raise tornado.web.HTTPError(400, "; ".join(problems))
+        price = await self.service.batcher.submit(row)
+        metrics.count("predictions")
+        self.write({"price": price})
+
+
+class BulkPredictHandler(BaseHandler):
+    def post(self):
+        payload = self.json_body()
+        queries = payload.get("queries") if isinstance(payload, dict) else payload
+        if not isinstance(queries, list):
+            raise tornado.web.HTTPError(400, "Expected a list of queries")
+        if not queries:
+            self.write({"prices": []})
+            return
+        if not all(isinstance(query, dict) for query in queries):
+            raise tornado.web.HTTPError(400, "Each query must be a JSON object")
+        try:
+            with metrics.timer("encode", endpoint="bulk"):
+                df = normalize_queries(pd.DataFrame(queries), errors='coerce')
+                problems = invalid_queries(df)
+                valid = valid_queries(df)
+                X = self.service.encoder.encode_batch(df[valid])
+        except (ValueError, KeyError, TypeError) as exc:
+            raise tornado.web.HTTPError(400, str(exc))
+        # Rows the form would reject get no price, and the reasons instead
+        prices = np.full(len(df), np.nan)
+        if valid.any():
+            prices[valid] = self.service.predict(X)
+        metrics.count("predictions", int(valid.sum()))
+        errors = [[reason for reason, mask in problems.items() if mask[i]] or None for i in range(len(df))]
+        self.write({
+            "prices": [None if np.isnan(p) else float(p) for p in prices],
+            "errors": errors,
+        })
+
+
+class HealthHandler(BaseHandler):
+    def get(self):
+        self.write({
+            "status": "ok",
+            "batches": self.service.batcher.batches,
+            "batched_rows": self.service.batcher.rows,
+            "cache": get_prediction_cache().stats(),
+            "artifacts": get_load_stats(),
+        })
+
+
+class ModelsHandler(BaseHandler):
+    def get(self):
+        if self.service.registry is None:
+            raise tornado.web.HTTPError(404, "Shadow scoring is off; start the service with --shadow")
+        stats = self.service.registry.stats()
+        # The primary only scores cache misses; shadow models see every row
+        stats["cache"] = get_prediction_cache().stats()
+        self.write(stats)
+
+
+class MetricsHandler(BaseHandler):
+    def get(self):
+        self.set_header("Content-Type", "text/plain; version=0.0.4")
+        self.write(metrics.prometheus_text())
+
+
+class PredictionService:
+    def __init__(self, model=None, max_batch=DEFAULT_MAX_BATCH, max_wait=DEFAULT_MAX_WAIT, registry=None):
+        self.encoder = FeatureEncoder()
+        self.registry = registry
+        if registry is not None:
+            # The primary model answers cache misses; its version is read on
+            # every call, as the registry reloads it when the file changes
+            model, model_version = registry.primary_model, registry.model_version
+        else:
+            model = model if model is not None else load_tree_engine()
+            model_version = artifact_version("model")
+        self.predictor = CachedPredictor(model, self.encoder, get_prediction_cache(), model_version)
+        self.batcher = MicroBatcher(self.predict, max_batch=max_batch, max_wait=max_wait)
+
+    def predict(self, X):
+        prices = self.predictor.predict(X)
+        if self.registry is not None:
+            # Every request's rows, cache hits included, so the shadow stats
+            # cover all traffic rather than just the queries seen for the first time
+            self.registry.shadow_score(X, prices)
+        return prices
+
+    def make_app(self):
+        return tornado.web.Application([
+            (r"/predict", PredictHandler, {"service": self}),
+            (r"/predict/bulk", BulkPredictHandler, {"service": self}),
+            (r"/health", HealthHandler, {"service": self}),
+            (r"/models", ModelsHandler, {"service": self}),
+            (r"/metrics", MetricsHandler, {"service": self}),
+        ])
+
+
+async def serve(host, port, max_batch, max_wait, primary=PRIMARY_VERSION, shadow=None):
+    registry = None
+    if shadow is not None:
+        registry = ModelRegistry.from_directory(primary=primary, shadow=shadow or "all")
+    service = PredictionService(max_batch=max_batch, max_wait=max_wait, registry=registry)
+    service.make_app().listen(port, address=host)
+    print(f"Serving flight price predictions on http://{host}:{port}")
+    await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP flight price prediction service with micro-batching")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT * 1000)
+    parser.add_argument("--primary", default=PRIMARY_VERSION, help="Model version that answers requests")
+    parser.add_argument("--shadow", nargs="*",
+                        help="Shadow-score these model_<version>.pkl versions (all found when given no names)")
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.max_batch, args.max_wait_ms / 1000, args.primary, args.shadow))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import threading
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+group_columns = ['source_city', 'destination_city', 'airline', 'class']
+detail_columns = ['departure_time', 'arrival_time', 'stops', 'days_left', 'duration', 'price']
+
+# Distance units: one day of days_left weighs the same as one hour of duration
+days_scale = 1.0
+duration_scale = 1.0
+
+# Groups smaller than this are searched by brute force
+min_tree_size = 32
+
+
+def _points(days_left, duration_hours):
+    return np.column_stack([
+        np.asarray(days_left, dtype=np.float64) / days_scale,
+        np.asarray(duration_hours, dtype=np.float64) / duration_scale,
+    ])
+
+
+def _column_arrays(rows):
+    return {col: rows[col].to_numpy() for col in detail_columns}
+
+
+class _Group:
+    # Rows of one (source, destination, airline, class) group, stored column-wise.
+    # Rows appended after the KD-tree was built sit in `pending`.
+    def __init__(self, columns):
+        self.columns = columns
+        self.points = _points(columns['days_left'], columns['duration'])
+        self.tree = cKDTree(self.points) if len(self.points) >= min_tree_size else None
+        self.pending = {col: values[:0] for col, values in columns.items()}
+        self.pending_points = np.empty((0, 2))
+
+    def __len__(self):
+        return len(self.points)
+
+    def add(self, columns):
+        self.pending = {col: np.concatenate([self.pending[col], columns[col]]) for col in detail_columns}
+        self.pending_points = np.vstack([self.pending_points, _points(columns['days_left'], columns['duration'])])
+
+    def merged(self):
+        return _Group({col: np.concatenate([self.columns[col], self.pending[col]]) for col in detail_columns})
+
+    def nearest(self, point, k):
+        if self.tree is not None:
+            distances, positions = self.tree.query(point, k=min(k, len(self)))
+            distances, positions = np.atleast_1d(distances), np.atleast_1d(positions)
+        else:
+            distances = np.hypot(*(self.points - point).T)
+            positions = np.arange(len(self))
+        # Pending rows are scanned directly and numbered after the tree's rows
+        pending_distances = np.hypot(*(self.pending_points - point).T)
+        distances = np.concatenate([distances, pending_distances])
+        positions = np.concatenate([positions, len(self) + np.arange(len(pending_distances))])
+        order = np.argsort(distances, kind='stable')[:k]
+        return distances[order], positions[order]
+
+    def take(self, positions):
+        taken = {}
+        for col in detail_columns:
+            values = self.columns[col]
+            if len(self.pending_points):
+                values = np.concatenate([values, self.pending[col]])
+            taken[col] = values[positions]
+        return taken
+
+
+class SimilarFlightsIndex:
+    """k-nearest historical flights on (days_left, duration) within an exact route/airline/class group.
+
+    Appended rows go to a per-group buffer that is scanned next to the
+    KD-tree; only that group's tree is rebuilt, once its buffer outgrows
+    ``rebuild_fraction`` of the group.
+    """
+
+    def __init__(self, groups, rebuild_fraction=0.1):
+        self.groups = groups
+        self.rebuild_fraction = rebuild_fraction
+        self.rows = sum(len(group) for group in groups.values())
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, historical_df, rebuild_fraction=0.1):
+        df = historical_df[group_columns + detail_columns]
+        groups = {tuple(key): _Group(_column_arrays(rows)) for key, rows in df.groupby(group_columns, observed=True)}
+        return cls(groups, rebuild_fraction)
+
+    def append(self, new_rows):
+        new_rows = new_rows[group_columns + detail_columns]
+        with self._lock:
+            self.rows += len(new_rows)
+            for key, rows in new_rows.groupby(group_columns, observed=True):
+                key = tuple(key)
+                columns = _column_arrays(rows)
+                group = self.groups.get(key)
+                if group is None:
+                    self.groups[key] = _Group(columns)
+                    continue
+                group.add(columns)
+                if len(group.pending_points) > max(min_tree_size, self.rebuild_fraction * len(group)):
+                    self.groups[key] = group.merged()
+
+    def nearest(self, source, destination, airline, flight_class, days_left, duration_mins, k=5):
+        point = _points([days_left], [duration_mins / 60])[0]
+        with self._lock:
+            group = self.groups.get((source, destination, airline, flight_class))
+            if group is None:
+                return pd.DataFrame(columns=detail_columns + ['distance'])
+            distances, positions = group.nearest(point, k)
+            matches = group.take(positions)
+        return pd.DataFrame({**matches, 'distance': distances})
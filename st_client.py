@@ -0,0 +1,139 @@
+import time
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from tornado.websocket import websocket_connect
+
+# WidgetState field each widget type reports its value in
+value_fields = {
+    'selectbox': 'string_value',
+    'checkbox': 'bool_value',
+    'number_input': 'double_value',
+    'slider': 'double_array_value',
+    'button': 'trigger_value',
+}
+
+
+class ScriptError(RuntimeError):
+    pass
+
+
+class Widget:
+    def __init__(self, kind, id, label, fragment_id):
+        self.kind = kind
+        self.id = id
+        self.label = label
+        self.fragment_id = fragment_id
+
+
+class RerunTiming:
+    def __init__(self, wall, script, runs):
+        # wall: send to script_finished as seen by the client; script: time the
+        # server spent executing the script (None if the server didn't report it)
+        self.wall = wall
+        self.script = script
+        self.runs = runs
+
+
+class AppSession:
+    """Headless browser session for a running ``streamlit run`` server.
+
+    Speaks the same websocket protocol as the frontend, so every rerun is
+    timed end to end on the server: widget changes inside a fragment only
+    rerun that fragment, exactly as they would for a real user.
+    """
+
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+        self.widgets = {}
+        self.states = {}
+        self.ws = None
+
+    async def connect(self):
+        ws_url = self.url.replace("http://", "ws://", 1).replace("https://", "wss://", 1)
+        self.ws = await websocket_connect(f"{ws_url}/_stcore/stream", subprotocols=["streamlit"])
+        return self
+
+    def close(self):
+        if self.ws is not None:
+            self.ws.close()
+            self.ws = None
+
+    def widget(self, name):
+        # Looked up by widget key, falling back to the label; the most recently
+        # drawn widget wins, since a widget's id changes with its parameters
+        widgets = list(self.widgets.values())[::-1]
+        for widget in widgets:
+            if widget.id.endswith(f"-{name}"):
+                return widget
+        for widget in widgets:
+            if widget.label == name:
+                return widget
+        raise KeyError(f"No widget with key or label {name!r}")
+
+    async def rerun(self, fragment_id=""):
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        msg.rerun_script.fragment_id = fragment_id
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+        # Triggers (button clicks) only fire for the rerun they were sent with
+        self.states = {id: state for id, state in self.states.items() if not state.HasField("trigger_value")}
+
+        start = time.perf_counter()
+        script, runs = None, 0
+        await self.ws.write_message(msg.SerializeToString(), binary=True)
+        while True:
+            raw = await self.ws.read_message()
+            if raw is None:
+                raise ConnectionError("Streamlit server closed the connection")
+            fm = ForwardMsg()
+            fm.ParseFromString(raw)
+            kind = fm.WhichOneof("type")
+            if kind == "delta":
+                self._read_delta(fm.delta)
+            elif kind == "page_profile":
+                # Sent after every script or fragment run while usage stats are on
+                script = (script or 0) + fm.page_profile.exec_time / 1e6
+            elif kind == "script_finished":
+                runs += 1
+                if fm.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise ScriptError("App failed to compile")
+                # st.rerun() ends a run early and starts another one
+                if fm.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    return RerunTiming(time.perf_counter() - start, script, runs)
+
+    def _read_delta(self, delta):
+        if delta.WhichOneof("type") != "new_element":
+            return
+        element = delta.new_element
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            raise ScriptError(element.exception.message)
+        proto = getattr(element, kind)
+        if kind in value_fields and proto.id:
+            self.widgets.pop(proto.id, None)
+            self.widgets[proto.id] = Widget(kind, proto.id, proto.label, delta.fragment_id)
+
+    def stage(self, name, value):
+        # Records a widget value without rerunning, like editing a field inside a form
+        widget = self.widget(name)
+        state = WidgetState(id=widget.id)
+        field = value_fields[widget.kind]
+        if field == "double_array_value":
+            state.double_array_value.data.extend(value if isinstance(value, (list, tuple)) else [value])
+        elif field == "string_value":
+            state.string_value = str(value)
+        else:
+            setattr(state, field, value)
+        self.states[widget.id] = state
+        return widget
+
+    async def set(self, name, value):
+        # Changes one widget and reruns what the frontend would: its fragment, or the page
+        widget = self.stage(name, value)
+        return await self.rerun(widget.fragment_id)
+
+    async def click(self, name):
+        return await self.set(name, True)
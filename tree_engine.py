@@ -0,0 +1,128 @@
+import os
+
+import numpy as np
+
+TREE_LEAF = -1
+
+# Node arrays copied out of a fitted sklearn tree (tree_.value reduced to one
+# output per node)
+tree_arrays = ("children_left", "children_right", "feature", "threshold", "value")
+# The same child and feature arrays with every leaf pointing at itself, as _traverse walks them
+looped_arrays = ("looped_left", "looped_right", "looped_feature")
+
+
+# Batches up to this size are walked in plain Python when no compiled kernel
+# is available; above it the vectorized traversal wins
+python_walk_rows = 32
+
+
+class FlatTree:
+    """Decision tree evaluated from flat node arrays instead of sklearn's predict().
+
+    Built from a fitted model it keeps the model's Cython ``tree_.apply`` as a
+    kernel and skips sklearn's per-call input validation and feature-name
+    checks. Loaded from saved arrays it walks the nodes with NumPy.
+    """
+
+    def __init__(self, children_left, children_right, feature, threshold, value, kernel=None):
+        self.children_left = children_left
+        self.children_right = children_right
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self._kernel = kernel
+        self._lists = None
+        self._looped = None
+
+    @classmethod
+    def from_model(cls, model):
+        tree = getattr(model, "tree_", None)
+        if tree is None:
+            raise TypeError(f"{type(model).__name__} is not a fitted decision tree")
+        if tree.n_outputs != 1:
+            raise ValueError("Only single-output trees are supported")
+        return cls(
+            children_left=np.ascontiguousarray(tree.children_left, dtype=np.intp),
+            children_right=np.ascontiguousarray(tree.children_right, dtype=np.intp),
+            feature=np.ascontiguousarray(tree.feature, dtype=np.intp),
+            threshold=np.ascontiguousarray(tree.threshold, dtype=np.float64),
+            value=np.ascontiguousarray(tree.value[:, 0, 0], dtype=np.float64),
+            kernel=tree,
+        )
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        arrays = dict(zip(tree_arrays, (getattr(self, name) for name in tree_arrays)))
+        arrays.update(zip(looped_arrays, self._looped_nodes()))
+        for name, values in arrays.items():
+            np.save(os.path.join(directory, f"{name}.npy"), values)
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        # With mmap every process reading the same files shares their pages,
+        # including the looped arrays, which would otherwise be built per process
+        mode = "r" if mmap else None
+        tree = cls(**{name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode) for name in tree_arrays})
+        looped_paths = [os.path.join(directory, f"{name}.npy") for name in looped_arrays]
+        if all(os.path.exists(path) for path in looped_paths):
+            tree._looped = tuple(np.load(path, mmap_mode=mode) for path in looped_paths)
+        return tree
+
+    def detached(self):
+        # Same node arrays, evaluated without the sklearn kernel
+        return FlatTree(*(getattr(self, name) for name in tree_arrays))
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in tree_arrays)
+
+    def _walk(self, X):
+        if self._lists is None:
+            self._lists = tuple(getattr(self, name).tolist() for name in tree_arrays[:4])
+        left, right, feature, threshold = self._lists
+        leaves = []
+        # tolist() turns the float32 values into exact Python floats
+        for x in X.tolist():
+            node = 0
+            while left[node] != TREE_LEAF:
+                node = left[node] if x[feature[node]] <= threshold[node] else right[node]
+            leaves.append(node)
+        return np.array(leaves, dtype=np.intp)
+
+    def _looped_nodes(self):
+        if self._looped is None:
+            # Leaves point at themselves so every row can take the same number of steps
+            leaf = self.children_left == TREE_LEAF
+            ids = np.arange(len(leaf))
+            self._looped = (
+                np.where(leaf, ids, self.children_left),
+                np.where(leaf, ids, self.children_right),
+                np.where(leaf, 0, self.feature),
+            )
+        return self._looped
+
+    def _traverse(self, X):
+        left, right, feature = self._looped_nodes()
+        rows = np.arange(len(X))
+        nodes = np.zeros(len(X), dtype=np.intp)
+        # Advance every row one level per iteration until all reach a leaf
+        while True:
+            go_left = X[rows, feature[nodes]] <= self.threshold[nodes]
+            next_nodes = np.where(go_left, left[nodes], right[nodes])
+            if np.array_equal(next_nodes, nodes):
+                return nodes
+            nodes = next_nodes
+
+    def apply(self, X):
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self._kernel is not None:
+            return self._kernel.apply(X)
+        if len(X) <= python_walk_rows:
+            return self._walk(X)
+        return self._traverse(X)
+
+    def predict(self, X):
+        return self.value[self.apply(X)]